@@ -0,0 +1,53 @@
+"""Microbenchmark: Dict vs FastDict
+
+    python -m benchmarks.bench_dict
+"""
+import timeit
+from filetools.tools import Dict, FastDict
+from filetools.classes import get_meta_key
+
+KEYS = ["Column_%d" % i for i in range(1000)]
+
+
+def fill(dict_class, get_key):
+    dct = dict_class(get_key=get_key)
+    for key in KEYS:
+        dct[key] = key
+    return dct
+
+
+def lookup(dct):
+    for key in KEYS:
+        dct[key]
+
+
+def iterate(dct):
+    for _ in dct.items():
+        pass
+    for _ in dct.keys():
+        pass
+    for _ in dct.values():
+        pass
+
+
+def main(number=200):
+    print("%-12s %-10s %12s %12s %8s" % ("get_key", "operation", "Dict [ms]",
+                                         "FastDict [ms]", "speedup"))
+    for name, get_key in [("none", None), ("str.lower", str.lower),
+                          ("get_meta_key", get_meta_key)]:
+        dicts = [fill(Dict, get_key), fill(FastDict, get_key)]
+        for operation, func in [
+            ("fill", lambda d: fill(type(d), get_key)),
+            ("lookup", lookup),
+            ("iterate", iterate),
+        ]:
+            t_dict, t_fast = [
+                timeit.timeit(lambda: func(d), number=number) for d in dicts
+            ]
+            print("%-12s %-10s %12.3f %12.3f %7.1fx" % (
+                name, operation, 1e3 * t_dict / number,
+                1e3 * t_fast / number, t_dict / t_fast))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Microbenchmark: file type resolution by hierarchy walk vs lookup table
+
+    python -m benchmarks.bench_file_types
+"""
+import timeit
+from filetools.classes import FileTool, FileResource, FileInspector
+
+
+def create_file_tool():
+    ft = FileTool()
+    for file_type in ["text/csv", "text/json", "image", "image/png"]:
+        name = file_type.replace("/", "_")
+        ft.register_file_class(
+            type(name, (FileResource, FileInspector),
+                 {"file_type": file_type, "file_types": [file_type]})
+        )
+    return ft
+
+
+def main(number=100000):
+    ft = create_file_tool()
+    print("%-24s %12s %12s %8s" % ("file_type", "walk [us]", "table [us]",
+                                   "speedup"))
+    for file_type in ["", "text", "text/csv", "text/csv/special/flavor"]:
+        t_walk = timeit.timeit(lambda: ft.resolve_file_type(file_type),
+                               number=number)
+        t_table = timeit.timeit(lambda: ft.get_file_type_entry(file_type),
+                                number=number)
+        print("%-24s %12.3f %12.3f %7.1fx" % (
+            repr(file_type), 1e6 * t_walk / number, 1e6 * t_table / number,
+            t_walk / t_table))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Benchmark cases for the hot paths, shared by the runner and the tests.
+
+Every case is a function `setup(size)` that prepares the data and
+returns a function without arguments (the measured work) and the number
+of items it processes (for throughput).
+"""
+import os
+import atexit
+import shutil
+import logging
+import tempfile
+from filetools.tools import (
+    Dict,
+    FastDict,
+    Filter,
+    NestedTables,
+    get_words_many,
+    structure_to_flat_dict,
+    flat_dict_to_structure,
+    records_to_columns,
+    _get_words,
+)
+from filetools.classes import FileTool
+from filetools.inspectors import Sha256Inspector, LineCountInspector
+from text_json import Database
+from . import generators
+
+
+def flat_dict_deep(size):
+    obj = generators.deep_json(size)
+    return lambda: structure_to_flat_dict(obj), size
+
+
+def flat_dict_wide(size):
+    obj = generators.wide_json(size)
+    return lambda: structure_to_flat_dict(obj), size
+
+
+def unfold_wide(size):
+    flat = structure_to_flat_dict(generators.wide_json(size))
+    return lambda: flat_dict_to_structure(flat), len(flat)
+
+
+def columns_sparse(size):
+    records = generators.wide_sparse_records(size)
+    return lambda: records_to_columns(records), size
+
+
+def get_words_cold(size):
+    identifiers = generators.identifiers(size)
+
+    def run():
+        _get_words.cache_clear()
+        get_words_many(identifiers)
+
+    return run, size
+
+
+def get_words_cached(size):
+    identifiers = generators.identifiers(size)
+    get_words_many(identifiers)
+    return lambda: get_words_many(identifiers), size
+
+
+def filter_items(size):
+    items = ["columnName%d" % i for i in range(size)]
+    flt = Filter(required=items[:10], optional=items[10:])
+    return lambda: flt(items), size
+
+
+def _fill_dict(dict_class, size):
+    keys = ["Column_%d" % i for i in range(size)]
+
+    def run():
+        dct = dict_class(get_key=str.lower)
+        for key in keys:
+            dct[key] = key
+        for key in keys:
+            dct[key]
+        list(dct.items())
+
+    return run, size
+
+
+def dict_lower(size):
+    return _fill_dict(Dict, size)
+
+
+def fast_dict_lower(size):
+    return _fill_dict(FastDict, size)
+
+
+def nested_tables_insert(size):
+    logging.getLogger("NestedTables").setLevel(logging.WARNING)
+    records = [
+        {"a": i, "unit": {"name": "m"}, "geo": {"lat": i, "lon": -i}}
+        for i in range(size)
+    ]
+
+    def run():
+        nt = NestedTables()
+        nt.logger.setLevel(logging.WARNING)
+        nt.add_table("t", ["/t"], auto_id=True)
+        nt.add_table("unit", ["/t/unit"], auto_id=True)
+        nt.add_table("geo", ["/t/geo"], auto_id=True)
+        for record in records:
+            nt.insert_row(record, "/t")
+
+    return run, size
+
+
+def database_parse(size):
+    data = {"records": generators.nested_records(size)}
+    return lambda: Database().parse(data), size
+
+
+def database_parse_deduplicate(size):
+    data = {"records": generators.nested_records(size)}
+    return lambda: Database(deduplicate=True).parse(data), size
+
+
+def _create_file_tree(size):
+    root = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, root, True)
+    return generators.file_tree(root, size, file_size=16384)
+
+
+def inspect_file(size):
+    paths = _create_file_tree(size)
+    file_tool = FileTool()
+    for inspector in (Sha256Inspector, LineCountInspector):
+        file_tool.register_file_class(inspector)
+
+    def run():
+        for path in paths:
+            file_tool.inspect_file(path)
+
+    return run, size
+
+
+def inspect_many(size):
+    paths = _create_file_tree(size)
+    file_tool = FileTool()
+    file_tool.register_file_class(Sha256Inspector)
+    workers = min(8, os.cpu_count() or 1)
+
+    def run():
+        for _ in file_tool.inspect_many(paths, workers=workers):
+            pass
+
+    return run, size
+
+
+#: name -> (setup, sizes for scaling)
+CASES = {
+    "structure_to_flat_dict[deep]": (flat_dict_deep, [100, 400, 1600]),
+    "structure_to_flat_dict[wide]": (flat_dict_wide, [1000, 4000, 16000]),
+    "flat_dict_to_structure[wide]": (unfold_wide, [1000, 4000, 16000]),
+    "records_to_columns[sparse]": (columns_sparse, [1000, 4000, 16000]),
+    "get_words[cold]": (get_words_cold, [1000, 4000, 16000]),
+    "get_words[cached]": (get_words_cached, [1000, 4000, 16000]),
+    "Filter": (filter_items, [1000, 10000, 100000]),
+    "Dict[str.lower]": (dict_lower, [1000, 10000, 100000]),
+    "FastDict[str.lower]": (fast_dict_lower, [1000, 10000, 100000]),
+    "NestedTables.insert_row": (nested_tables_insert, [500, 2000, 8000]),
+    "Database.parse": (database_parse, [500, 2000, 8000]),
+    "Database.parse[deduplicate]": (database_parse_deduplicate,
+                                    [500, 2000, 8000]),
+    "FileTool.inspect_file": (inspect_file, [20, 80, 320]),
+    "FileTool.inspect_many": (inspect_many, [20, 80, 320]),
+}
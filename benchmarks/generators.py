@@ -0,0 +1,113 @@
+"""Synthetic (deterministic) data for the benchmarks."""
+import os
+import random
+
+
+def deep_json(depth, leaf="value"):
+    """Nested dicts and lists, `depth` levels deep
+
+    Examples:
+        >>> deep_json(3)
+        {'k0': [{'k2': 'value', 'n': 2}], 'n': 0}
+    """
+    obj = leaf
+    for level in reversed(range(depth)):
+        if level % 2:
+            obj = [obj]
+        else:
+            obj = {"k%d" % level: obj, "n": level}
+    return obj
+
+
+def wide_json(width, n_nested=10, seed=0):
+    """One record with `width` keys, some with nested lists and dicts"""
+    rnd = random.Random(seed)
+    record = {}
+    for i in range(width):
+        if i % (width // n_nested or 1) == 0:
+            record["nested_%d" % i] = [
+                {"x": rnd.random(), "y": [rnd.randint(0, 9) for _ in range(3)]}
+                for _ in range(3)
+            ]
+        else:
+            record["field_%d" % i] = rnd.choice(
+                [rnd.randint(0, 1000), rnd.random(), "text %d" % i, None])
+    return record
+
+
+def wide_sparse_records(n_records, n_columns=200, density=0.1, seed=0):
+    """Flat records with (mostly) different keys out of n_columns
+
+    Returns:
+        list of dicts
+    """
+    rnd = random.Random(seed)
+    columns = ["columnName%d" % i for i in range(n_columns)]
+    n_keys = max(1, int(density * n_columns))
+    return [
+        {c: rnd.randint(0, 10 ** 6) for c in rnd.sample(columns, n_keys)}
+        for _ in range(n_records)
+    ]
+
+
+def nested_records(n_records, n_repeated=10, seed=0):
+    """Records as in typical API dumps: ids, nested 1-1 objects
+    (often repeated, e.g. units), lists of objects and lists of values
+    """
+    rnd = random.Random(seed)
+    units = [{"name": "unit %d" % i, "si": {"factor": 10 ** i}}
+             for i in range(n_repeated)]
+    return [
+        {
+            "id": i,
+            "name": "record %d" % i,
+            "value": rnd.random(),
+            "unit": dict(rnd.choice(units)),
+            "measurements": [
+                {"t": j, "v": rnd.random(), "flags": ["a", "b"][:j % 3]}
+                for j in range(rnd.randint(0, 5))
+            ],
+            "tags": ["tag%d" % rnd.randint(0, 20) for _ in range(3)],
+        }
+        for i in range(n_records)
+    ]
+
+
+def identifiers(n, seed=0):
+    """Column header like identifiers in different styles"""
+    rnd = random.Random(seed)
+    words = ["user", "id", "JSON", "value", "created", "at", "HTTP",
+             "response", "code", "x2"]
+    styles = [
+        lambda w: "_".join(w),
+        lambda w: w[0] + "".join(x.capitalize() for x in w[1:]),
+        lambda w: "-".join(w).upper(),
+        lambda w: " ".join(w),
+        lambda w: "__" + "_".join(w) + "__",
+    ]
+    return [
+        rnd.choice(styles)(rnd.sample(words, rnd.randint(1, 4)))
+        for _ in range(n)
+    ]
+
+
+def file_tree(root, n_files, files_per_dir=50, file_size=4096, seed=0):
+    """Create a directory tree with n_files files of random bytes
+
+    Args:
+        root (str): existing directory
+    Returns:
+        list of file paths
+    """
+    rnd = random.Random(seed)
+    paths = []
+    for i in range(n_files):
+        directory = os.path.join(root, "d%d" % (i // files_per_dir),
+                                 "s%d" % (i % 3))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "f%d.bin" % i)
+        with open(path, "wb") as file:
+            file.write(rnd.getrandbits(8 * file_size).to_bytes(file_size,
+                                                              "little"))
+        paths.append(path)
+    return paths
@@ -0,0 +1,85 @@
+"""Run all benchmark cases: throughput, peak memory and scaling
+
+    python -m benchmarks.run [--quick] [--filter NAME] [--json FILE]
+
+For every case and size, the best of `--repeat` runs is reported as
+time and throughput, the peak of traced memory (tracemalloc) of one
+extra run, and per case the scaling exponent of time vs. size
+(1.0: linear). Results can be saved as json to compare runs.
+"""
+import gc
+import sys
+import json
+import math
+import time
+import argparse
+import tracemalloc
+from .cases import CASES
+
+
+def measure(run, repeat=3):
+    """Return best time [s] and peak memory [bytes] of run()"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t_start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t_start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def get_scaling(results):
+    """Exponent k in time ~ size**k between smallest and largest size"""
+    (size_1, time_1), (size_2, time_2) = results[0], results[-1]
+    if size_1 == size_2 or not time_1 or not time_2:
+        return None
+    return math.log(time_2 / time_1) / math.log(size_2 / size_1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true",
+                        help="only the smallest size of every case")
+    parser.add_argument("--filter", default="",
+                        help="only cases containing this text")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="save results to this file")
+    args = parser.parse_args(argv)
+
+    print("%-32s %8s %11s %13s %11s" % (
+        "case", "size", "time [ms]", "items/s", "peak [KiB]"))
+    report = {}
+    for name, (setup, sizes) in CASES.items():
+        if args.filter not in name:
+            continue
+        if args.quick:
+            sizes = sizes[:1]
+        results = []
+        for size in sizes:
+            run, n_items = setup(size)
+            seconds, peak = measure(run, repeat=args.repeat)
+            results.append((size, seconds))
+            report.setdefault(name, []).append({
+                "size": size, "seconds": seconds,
+                "items_per_second": n_items / seconds, "peak_bytes": peak,
+            })
+            print("%-32s %8d %11.3f %13.0f %11.1f" % (
+                name, size, 1e3 * seconds, n_items / seconds, peak / 1024))
+        scaling = get_scaling(results)
+        if scaling is not None:
+            print("%-32s %8s scaling: time ~ size^%.2f" % (name, "", scaling))
+        sys.stdout.flush()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
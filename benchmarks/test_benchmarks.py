@@ -0,0 +1,21 @@
+"""Benchmarks of the hot paths with pytest-benchmark (smallest sizes)
+
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare
+
+Skipped if pytest-benchmark is not installed, see benchmarks/run.py
+for a standalone runner with peak memory and scaling.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.cases import CASES  # noqa: E402
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_case(benchmark, name):
+    setup, sizes = CASES[name]
+    run, n_items = setup(sizes[0])
+    benchmark.extra_info["n_items"] = n_items
+    benchmark(run)
@@ -0,0 +1,217 @@
+import os
+import pickle
+import time
+import atexit
+import sqlite3
+import threading
+
+DEFAULT_MAX_ENTRIES = 1000000
+DEFAULT_COMMIT_EVERY = 1000
+
+
+def get_fingerprint(path):
+    """Return a tuple that changes whenever the file changes.
+
+    Args:
+        path (str): path to file
+    Returns:
+        tuple (size, mtime_ns, inode)
+    """
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def get_inspector_id(inspector_class):
+    """Return a unique name for an inspector class"""
+    return "%s.%s" % (inspector_class.__module__,
+                      inspector_class.__qualname__)
+
+
+class MetadataCache:
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES,
+                 commit_every=DEFAULT_COMMIT_EVERY):
+        """Persistent (SQLite) cache for the results of file inspectors.
+
+        Entries are stored per (file path, inspector) together with
+        the stat fingerprint of the file and the version of the inspector.
+        An entry is only returned if both still match.
+        Writes are batched and committed every `commit_every` operations,
+        on `flush` and at exit. If there are more than `max_entries`
+        entries, the least recently used ones are removed on commit.
+
+        Args:
+            path (str): path of the cache database file
+            max_entries (int): maximum number of entries
+            commit_every (int): number of writes per transaction
+        """
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.commit_every = commit_every
+        self._open()
+
+    def _open(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # path -> {inspector: row}
+        self._n_pending = 0
+        self._touched = {}  # (path, inspector) -> last used
+        self._n_inserted = 0  # since last eviction
+        # autocommit mode: transactions are opened explicitly in _commit,
+        # so no lock is held between commits (several processes
+        # can share the cache)
+        self._connection = sqlite3.connect(self.path, timeout=60,
+                                           check_same_thread=False,
+                                           isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta ("
+            "path TEXT NOT NULL, inspector TEXT NOT NULL, "
+            "version TEXT NOT NULL, size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL, "
+            "meta BLOB NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (path, inspector))"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS meta_last_used ON meta (last_used)"
+        )
+        atexit.register(self.flush)
+
+    def __getstate__(self):
+        # connections cannot be pickled: reopen in __setstate__
+        return {
+            "path": self.path,
+            "max_entries": self.max_entries,
+            "commit_every": self.commit_every,
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def get(self, path, fingerprint):
+        """Get all valid cached entries for a file.
+
+        Args:
+            path (str): path to file
+            fingerprint (tuple): current fingerprint of the file
+        Returns:
+            dict: inspector id -> (version, meta)
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT inspector, version, meta FROM meta "
+                "WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+                (path,) + tuple(fingerprint),
+            ).fetchall()
+            now = time.time()
+            res = {}
+            for inspector, version, meta in rows:
+                if not isinstance(meta, bytes):
+                    continue  # json text of an older cache: miss
+                self._touched[(path, inspector)] = now
+                res[inspector] = (version, pickle.loads(meta))
+            # not yet committed entries
+            for inspector, row in self._pending.get(path, {}).items():
+                if row[3:6] == tuple(fingerprint):
+                    res[inspector] = (row[2], pickle.loads(row[6]))
+            if len(self._touched) >= self.commit_every:
+                self._commit()
+            return res
+
+    def put(self, path, fingerprint, inspector, version, meta):
+        """Add or replace an entry.
+
+        Metadata is pickled, so a hit returns an equal copy of it.
+        Metadata that cannot be pickled is not cached.
+
+        Args:
+            path (str): path to file
+            fingerprint (tuple): fingerprint of the file
+            inspector (str): inspector id
+            version (str): inspector version
+            meta (dict): result of the inspector
+        """
+        try:
+            meta = pickle.dumps(meta, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        row = (path, inspector, version) + tuple(fingerprint) \
+            + (meta, time.time())
+        with self._lock:
+            self._pending.setdefault(path, {})[inspector] = row
+            self._n_pending += 1
+            if self._n_pending >= self.commit_every:
+                self._commit()
+
+    def invalidate(self, path=None, inspector=None):
+        """Remove entries from the cache.
+
+        Args:
+            path (str, optional): only remove entries for this file
+            inspector (str, optional): only remove entries of this inspector
+        """
+        where, params = [], []
+        if path is not None:
+            where.append("path = ?")
+            params.append(str(path))
+        if inspector is not None:
+            where.append("inspector = ?")
+            params.append(inspector)
+        sql = "DELETE FROM meta"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            self._commit()
+            self._connection.execute(sql, params)
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM meta").fetchone()[0]
+
+    def flush(self):
+        """Commit pending writes and evict old entries"""
+        with self._lock:
+            self._commit(evict=True)
+
+    def _commit(self, evict=False):
+        self._n_inserted += self._n_pending
+        evict = evict or self._n_inserted >= self.commit_every
+        if not (self._pending or self._touched or evict):
+            return
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (row for rows in self._pending.values()
+                 for row in rows.values()),
+            )
+            self._connection.executemany(
+                "UPDATE meta SET last_used = ? "
+                "WHERE path = ? AND inspector = ?",
+                ((t, p, i) for (p, i), t in self._touched.items()),
+            )
+            if evict:
+                n_remove = self._connection.execute(
+                    "SELECT COUNT(*) FROM meta").fetchone()[0] \
+                    - self.max_entries
+                if n_remove > 0:
+                    self._connection.execute(
+                        "DELETE FROM meta WHERE rowid IN (SELECT rowid "
+                        "FROM meta ORDER BY last_used LIMIT ?)", (n_remove,)
+                    )
+                self._n_inserted = 0
+        except Exception:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+        self._pending = {}
+        self._n_pending = 0
+        self._touched = {}
+
+    def close(self):
+        """Commit pending writes and close the database"""
+        atexit.unregister(self.flush)
+        with self._lock:
+            self._commit(evict=True)
+            self._connection.close()
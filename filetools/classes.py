@@ -1,5 +1,25 @@
 import os
-from .tools import Dict
+import mmap
+import asyncio
+import inspect
+from itertools import islice, chain
+from contextlib import nullcontext
+from multiprocessing.util import Finalize
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    FIRST_COMPLETED,
+    wait,
+)
+from .tools import FastDict
+from .columns import ColumnTable
+from .sniff import ContentSniffer, DEFAULT_PREFIX_SIZE, is_text
+from .cache import (
+    MetadataCache,
+    DEFAULT_MAX_ENTRIES,
+    get_fingerprint,
+    get_inspector_id,
+)
 
 
 def get_file_types_hierarchy(file_type):
@@ -12,19 +32,206 @@ def get_file_types_hierarchy(file_type):
     return types
 
 
+def get_meta_key(key):
+    """Normalize metadata keys (case insensitive)"""
+    return str(key).lower() if key else ""
+
+
+def is_coroutine_inspector(inspector_class):
+    """Return True if inspect_file of the inspector is a coroutine"""
+    return inspect.iscoroutinefunction(inspector_class.inspect_file)
+
+
+def merge_results(inspectors, results):
+    """Merge the results of inspectors (in order).
+
+    Args:
+        inspectors: list of inspector classes
+        results (dict): inspector class -> meta
+    Returns:
+        dict like with key value pairs of meta data
+    """
+    meta_all = FastDict(get_key=get_meta_key)
+    for insp in inspectors:
+        meta_all.update(results[insp])
+    return meta_all
+
+
+def run_inspector(inspector_class, path, buffer=None):
+    """Run an inspector on a path or a shared buffer.
+
+    Args:
+        inspector_class: subclass of FileInspector
+        path (str): path to file
+        buffer (FileBuffer, optional): opened file content
+    Returns:
+        dict with key value pairs of meta data
+    """
+    if buffer is None:
+        return inspector_class.inspect_file(path)
+    return inspector_class.inspect_buffer(path, buffer.view)
+
+
+class FileBuffer:
+    def __init__(self, path):
+        """Read only, lazily memory mapped content of a file.
+
+        The file is opened on the first access of `view`
+        and closed by `close` (or at the end of a with block).
+        Users of `view` must not keep references to it (or slices of it)
+        after that.
+
+        Args:
+            path (str): path to file
+        """
+        self.path = path
+        self._file = None
+        self._mmap = None
+        self._view = None
+
+    @property
+    def view(self):
+        """memoryview of the whole file content (zero copy)"""
+        if self._view is None:
+            self._file = open(self.path, "rb")
+            if os.fstat(self._file.fileno()).st_size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap)
+            else:  # empty files cannot be mapped
+                self._view = memoryview(b"")
+        return self._view
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def iter_file_entries(root):
+    """Recursively yield os.DirEntry objects of all files below root.
+
+    Directories are traversed lazily with an explicit stack,
+    so only the entries of the current directories are held in memory.
+
+    Args:
+        root: path of the root directory
+    Yields:
+        os.DirEntry (with cached stat results)
+    """
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry
+
+
+def iter_files(root):
+    """Recursively yield the paths of all files below root.
+
+    Args:
+        root: path of the root directory
+    Yields:
+        file paths (str)
+    """
+    for entry in iter_file_entries(root):
+        yield entry.path
+
+
+DEFAULT_CHUNK_SIZE = 2 ** 20
+
+async def aiter_blocking(iterable, executor=None, batch_size=256):
+    """Consume a blocking iterable (e.g. a directory walk) in an executor.
+
+    Args:
+        iterable: any iterable
+        executor (optional): concurrent.futures executor
+        batch_size (int): number of items fetched per executor call
+    Yields:
+        the items of iterable
+    """
+    loop = asyncio.get_running_loop()
+    iterator = iter(iterable)
+    while True:
+        batch = await loop.run_in_executor(executor, list,
+                                           islice(iterator, batch_size))
+        if not batch:
+            return
+        for item in batch:
+            yield item
+
+
+# pseudo inspector id for the detected file type in the cache
+FILE_TYPE_CACHE_ID = "file_type"
+
+# FileTool instance of a worker process, see inspect_many
+_worker_file_tool = None
+
+
+def _init_worker(file_tool):
+    global _worker_file_tool
+    _worker_file_tool = file_tool
+    if file_tool.cache is not None:
+        # atexit handlers do not run in pool workers
+        Finalize(file_tool.cache, file_tool.cache.flush, exitpriority=10)
+
+
+def _inspect_file_worker(path):
+    return _worker_file_tool.inspect_file_item(path)
+
+
 class FileTool:
     def __init__(self, **user_settings):
         """
 
         Args:
             user_settings: dictionary of user settings overriding the defaults
+
+                * cache_path: path of a persistent metadata cache
+                  (see MetadataCache). Default: no cache
+                * cache_max_entries: maximum number of cached entries
+                * sniff_size: number of bytes read from the start of a file
+                  to identify its type. 0: do not read the file
+                * shared_buffer: if True, inspect_file memory maps each file
+                  once and passes the same view to all inspectors
+                  (see FileInspector.inspect_buffer)
+                * chunk_size: size of the chunks fed to StreamInspectors
         """
         self.config = {}
         self.config.update(user_settings)
-        self.resource_classes = Dict(allow_overwrite=False)
-        self.file_inspector_classes = Dict()
+        self.cache = None
+        if self.config.get("cache_path"):
+            self.cache = MetadataCache(
+                self.config["cache_path"],
+                max_entries=self.config.get("cache_max_entries",
+                                            DEFAULT_MAX_ENTRIES),
+            )
+        self.resource_classes = FastDict(allow_overwrite=False)
+        self.file_inspector_classes = FastDict()
+        # file_type -> (resource class, inspector classes),
+        # rebuilt on every registration
+        self.file_types_table = {}
+        self.sniffer = None
+        # inspectors of all detectable file types, if they are the same
+        self.common_inspectors = None
         # register the root file type
         self.register_file_class(FileBinary)
+        self.register_file_class(FileText)
 
     def identify_file(self, path, file_type=""):
         """Identify a file.
@@ -32,16 +239,96 @@ class FileTool:
         Args:
             path: Path like object describing the location
             file_type (str): file type identifier
-                             like "text/json" or "text/image/jpg"
+                             like "text/json" or "text/image/jpg".
+                             If not given, it is detected from the
+                             content of the file (if path is given)
         Returns:
             FileResource class that matches the file
         """
+        if not file_type and path is not None:
+            file_type = self.sniff_file_type(path)
+        return self.get_file_type_entry(file_type)[0]
 
+    def sniff_file_type(self, path, buffer=None):
+        """Detect file type from the first bytes of a file.
+
+        Args:
+            path: Path like object describing the location
+            buffer (FileBuffer, optional): already opened file content
+        Returns:
+            file type (str)
+        """
+        prefix_size = self.sniffer.prefix_size
+        if not prefix_size:
+            return ""
+        if buffer is not None:
+            return self.sniffer.sniff(bytes(buffer.view[:prefix_size]))
+        return self.sniffer.sniff_file(path)
+
+    def get_file_type_entry(self, file_type):
+        """Look up resource class and inspectors for a file type.
+
+        Args:
+            file_type (str): file type identifier
+        Returns:
+            tuple (resource class, tuple of inspector classes)
+        """
+        try:
+            return self.file_types_table[file_type]
+        except KeyError:
+            # not a registered file type: resolve once and remember
+            entry = self.resolve_file_type(file_type)
+            self.file_types_table[file_type] = entry
+            return entry
+
+    def resolve_file_type(self, file_type):
+        """Find resource class and inspectors for a file type.
+
+        Walks up the file type hierarchy to the closest registered
+        resource class and collects all inspectors of that class's
+        file type OR any one above that in the hierarchy,
+        i.e. "text/csv" also gets information from "text",
+        starting from the top.
+
+        Args:
+            file_type (str): file type identifier
+        Returns:
+            tuple (resource class, tuple of inspector classes)
+        """
         for ftype in reversed(get_file_types_hierarchy(file_type)):
             resource_class = self.resource_classes.get(ftype)
             if resource_class:
-                return resource_class
-        raise Exception("No FileResource matching '%s'" % file_type)
+                break
+        else:
+            raise Exception("No FileResource matching '%s'" % file_type)
+        inspectors = []
+        for ftype in get_file_types_hierarchy(resource_class.file_type):
+            inspectors.extend(self.file_inspector_classes.get(ftype, []))
+        return resource_class, tuple(inspectors)
+
+    def build_file_types_table(self):
+        """Resolve all registered file types and their ancestors"""
+        file_types = set()
+        for ftype in list(self.resource_classes.keys()) \
+                + list(self.file_inspector_classes.keys()):
+            file_types.update(get_file_types_hierarchy(ftype))
+        table = {}
+        if "" in self.resource_classes:
+            for ftype in file_types:
+                table[ftype] = self.resolve_file_type(ftype)
+        self.file_types_table = table
+        self.sniffer = ContentSniffer.from_resource_classes(
+            self.resource_classes.values(),
+            prefix_size=self.config.get("sniff_size", DEFAULT_PREFIX_SIZE),
+        )
+        # if every file type the sniffer can detect gets the same
+        # inspectors, inspection does not have to read the file
+        self.common_inspectors = None
+        if table:
+            inspectors = {self.get_file_type_entry(ftype)[1]
+                          for ftype in self.sniffer.get_file_types()}
+            if len(inspectors) == 1:
+                self.common_inspectors = inspectors.pop()
 
     def inspect_file(self, path):
         """Identify a file.
@@ -52,18 +339,331 @@ class FileTool:
             dict like with key value pairs of meta data
             provided by the inspector classes
         """
-        file_resource_class = self.identify_file(path)
-        file_type = file_resource_class.file_type
-        # get all the registered inspectors that are appropriate
-        # for this file type OR any one above that in the hierarchy,
-        # i.e. "text/csv" also gets information from "text"
-        # starting from the top
-        meta_all = Dict(get_key=lambda x: str(x).lower() if x else "")
-        for ftype in get_file_types_hierarchy(file_type):
-            for insp in self.file_inspector_classes.get(ftype, []):
-                meta = insp.inspect_file(str(path))
-                meta_all.update(meta)
-        return meta_all
+        path = str(path)
+        inspectors, results, _, _ = self._run_inspectors(path)
+        return merge_results(inspectors, results)
+
+    async def inspect_file_async(self, path, executor=None):
+        """Identify a file without blocking the event loop.
+
+        Blocking inspectors (and identification and cache access)
+        run in `executor`, inspectors with a coroutine `inspect_file`
+        are awaited concurrently in the event loop.
+
+        Args:
+            path: Path like object describing the location
+            executor (optional): concurrent.futures executor.
+                Default: the default executor of the loop
+        Returns:
+            dict like with key value pairs of meta data
+            provided by the inspector classes
+        """
+        path = str(path)
+        loop = asyncio.get_running_loop()
+        inspectors, results, pending, fingerprint = \
+            await loop.run_in_executor(executor, self._run_inspectors, path,
+                                       True)
+        if pending:
+            metas = await asyncio.gather(
+                *(insp.inspect_file(path) for insp in pending))
+            results.update(zip(pending, metas))
+            if self.cache is not None:
+                for insp in pending:
+                    self.cache.put(path, fingerprint, get_inspector_id(insp),
+                                   str(insp.version), results[insp])
+        return merge_results(inspectors, results)
+
+    async def inspect_file_item_async(self, path, executor=None):
+        """Inspect a file and return it together with its path.
+
+        Args:
+            path: Path like object describing the location
+            executor (optional): see `inspect_file_async`
+        Returns:
+            tuple (path, meta)
+        """
+        return path, await self.inspect_file_async(path, executor)
+
+    async def inspect_many_async(self, paths, concurrency=64, executor=None):
+        """Inspect many files concurrently in the event loop.
+
+        Use with ``async for path, meta in ft.inspect_many_async(paths)``.
+        Results are yielded in completion order. Only up to `concurrency`
+        files are in flight at a time, so `paths` can be a lazy
+        (async) iterable of any length.
+
+        Args:
+            paths: iterable or async iterable of path like objects.
+                Blocking iterables are consumed in batches in the executor.
+            concurrency (int): maximum number of files inspected at a time
+            executor (optional): concurrent.futures executor for the
+                blocking work. Default: thread pool with
+                `concurrency` workers
+        Yields:
+            tuples (path, meta) with the result of `inspect_file_async`
+        """
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+        if not hasattr(paths, "__aiter__"):
+            paths = aiter_blocking(paths, executor)
+        pending = set()
+        try:
+            async for path in paths:
+                if len(pending) >= concurrency:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+                pending.add(asyncio.ensure_future(
+                    self.inspect_file_item_async(path, executor)))
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if own_executor:
+                executor.shutdown(wait=False)
+            if self.cache is not None:
+                self.cache.flush()
+
+    def inspect_tree_async(self, root, **kwargs):
+        """Inspect all files below a directory in the event loop.
+
+        Args:
+            root: path of the root directory
+            kwargs: passed on to `inspect_many_async`
+        Yields:
+            tuples (path, meta) in completion order
+        """
+        return self.inspect_many_async(iter_files(root), **kwargs)
+
+    def _run_inspectors(self, path, skip_coroutines=False):
+        """Get results of all inspectors for a file.
+
+        Args:
+            path (str): path to file
+            skip_coroutines (bool): if True, coroutine inspectors are not run
+        Returns:
+            tuple (inspectors, results, pending, fingerprint)
+
+            * inspectors: applicable inspector classes
+            * results: dict inspector class -> meta
+            * pending: coroutine inspectors that were skipped
+            * fingerprint: of the file (if there is a cache)
+        """
+        buffer = None
+        if self.config.get("shared_buffer"):
+            # only opened on first use, e.g. not if all results are cached
+            buffer = FileBuffer(path)
+        with buffer or nullcontext():
+            return self._run_inspectors_buffer(path, buffer, skip_coroutines)
+
+    def _run_inspectors_buffer(self, path, buffer, skip_coroutines):
+        fingerprint = None
+        if self.cache is not None:
+            fingerprint = get_fingerprint(path)
+            cached = self.cache.get(path, fingerprint)
+        # all the registered inspectors that are appropriate
+        # for this file type OR any one above that in the hierarchy
+        inspectors = self.common_inspectors
+        if inspectors is None:
+            # the inspectors depend on the content
+            if self.cache is not None:
+                # the detected file type is cached like an inspector result
+                hit = cached.get(FILE_TYPE_CACHE_ID)
+                if hit and hit[0] == self.sniffer.version:
+                    file_type = hit[1]
+                else:
+                    file_type = self.sniff_file_type(path, buffer)
+                    self.cache.put(path, fingerprint, FILE_TYPE_CACHE_ID,
+                                   self.sniffer.version, file_type)
+            else:
+                file_type = self.sniff_file_type(path, buffer)
+            inspectors = self.get_file_type_entry(file_type)[1]
+        results = {}  # inspector -> meta
+        computed = []
+        stream_inspectors = []
+        pending = []
+        for insp in inspectors:
+            if self.cache is not None:
+                hit = cached.get(get_inspector_id(insp))
+                if hit and hit[0] == str(insp.version):
+                    results[insp] = hit[1]
+                    continue
+            if issubclass(insp, StreamInspector):
+                stream_inspectors.append(insp)
+            elif is_coroutine_inspector(insp):
+                if skip_coroutines:
+                    pending.append(insp)
+                    continue
+                results[insp] = asyncio.run(insp.inspect_file(path))
+            else:
+                results[insp] = run_inspector(insp, path, buffer)
+            computed.append(insp)
+        if stream_inspectors:
+            # all streaming inspectors share one pass over the content
+            metas = FileBinary.inspect_stream(
+                path, stream_inspectors,
+                chunk_size=self.config.get("chunk_size", DEFAULT_CHUNK_SIZE),
+                buffer=buffer.view if buffer is not None else None,
+            )
+            results.update(zip(stream_inspectors, metas))
+        if self.cache is not None:
+            for insp in computed:
+                self.cache.put(path, fingerprint, get_inspector_id(insp),
+                               str(insp.version), results[insp])
+        return inspectors, results, pending, fingerprint
+
+    def invalidate_cache(self, path=None, inspector_class=None):
+        """Remove entries from the metadata cache (if there is one).
+
+        Args:
+            path (optional): only remove entries for this file
+            inspector_class (optional): only remove entries of this inspector
+        """
+        if self.cache is not None:
+            inspector = None
+            if inspector_class:
+                inspector = get_inspector_id(inspector_class)
+            self.cache.invalidate(path=path, inspector=inspector)
+
+    def inspect_file_item(self, path):
+        """Inspect a file and return it together with its path.
+
+        Args:
+            path: Path like object describing the location
+        Returns:
+            tuple (path, meta)
+        """
+        return path, self.inspect_file(path)
+
+    def inspect_many(self, paths, workers=None, executor="thread",
+                     max_pending=None):
+        """Inspect many files concurrently.
+
+        Results are yielded in completion order, not in the order of
+        `paths`. Only up to `max_pending` files are submitted at a time,
+        so `paths` can be a lazy iterable of any length.
+
+        Args:
+            paths: iterable of path like objects
+            workers (int, optional): number of worker threads or processes.
+                Default: number of cpus
+            executor (str): "thread" or "process". In a process pool,
+                the FileTool (including all registered classes)
+                is pickled once per worker.
+            max_pending (int, optional): maximum number of files
+                submitted but not yet yielded. Default: 4 * workers
+        Yields:
+            tuples (path, meta) with the result of `inspect_file`
+        """
+        workers = workers or os.cpu_count() or 1
+        max_pending = max_pending or 4 * workers
+        if executor == "thread":
+            pool = ThreadPoolExecutor(max_workers=workers)
+            func = self.inspect_file_item
+        elif executor == "process":
+            pool = ProcessPoolExecutor(max_workers=workers,
+                                       initializer=_init_worker,
+                                       initargs=(self,))
+            func = _inspect_file_worker
+        else:
+            raise ValueError("Invalid executor: %s" % executor)
+
+        pending = set()
+        try:
+            for path in paths:
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(pool.submit(func, path))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            # generator closed early or error: drop the queued work
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+            if self.cache is not None:
+                self.cache.flush()
+
+    def rescan(self, root, index, **kwargs):
+        """Update a file index with the changes below a directory.
+
+        Only files that are new or whose stat fingerprint
+        (size, mtime_ns, inode) changed are inspected (concurrently,
+        see `inspect_many`). The stat results of the directory walk
+        are reused. Files in the index that no longer exist are removed.
+
+        Args:
+            root: path of the root directory
+            index (FileIndex): persisted index, paths are stored absolute
+            kwargs: passed on to `inspect_many`
+        Yields:
+            tuples (status, path, meta) for every change, status is
+            "added", "modified" or "deleted" (meta is None)
+        """
+        root = os.path.abspath(str(root))
+        known = index.get_fingerprints(root)
+        changed = {}  # path -> (status, fingerprint)
+
+        def iter_changed():
+            for entry in iter_file_entries(root):
+                stat = entry.stat()
+                fingerprint = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+                old_fingerprint = known.pop(entry.path, None)
+                if old_fingerprint == fingerprint:
+                    continue
+                status = "added" if old_fingerprint is None else "modified"
+                changed[entry.path] = (status, fingerprint)
+                yield entry.path
+
+        for path, meta in self.inspect_many(iter_changed(), **kwargs):
+            status, fingerprint = changed.pop(path)
+            index.put(path, fingerprint, meta)
+            yield status, path, meta
+        # everything not seen in the walk has been deleted
+        index.delete(known)
+        index.flush()
+        for path in known:
+            yield "deleted", path, None
+
+    def inspect_table(self, paths, **kwargs):
+        """Inspect many files concurrently into a columnar table.
+
+        Compact alternative to collecting the results of `inspect_many`:
+        all rows share one (case insensitive) schema and numeric
+        metadata is stored in typed arrays.
+
+        Args:
+            paths: iterable of path like objects
+            kwargs: passed on to `inspect_many`
+        Returns:
+            ColumnTable with a column "path" and one column
+            per metadata key. Rows are in completion order.
+        """
+        table = ColumnTable(get_key=get_meta_key)
+        for path, meta in self.inspect_many(paths, **kwargs):
+            table.append(chain((("path", str(path)),), meta.items()))
+        return table
+
+    def inspect_tree(self, root, **kwargs):
+        """Inspect all files below a directory concurrently.
+
+        Args:
+            root: path of the root directory
+            kwargs: passed on to `inspect_many`
+        Yields:
+            tuples (path, meta) in completion order
+        """
+        return self.inspect_many(iter_files(root), **kwargs)
 
     def register_file_resource_class(self, file_resource_class):
         """Register a new class based on FileResource
@@ -73,6 +673,7 @@ class FileTool:
         """
         ftype = file_resource_class.file_type
         self.resource_classes[ftype] = file_resource_class
+        self.build_file_types_table()
 
     def register_file_inspector_class(self, file_inspector_class):
         """Register a new class based on FileResource
@@ -84,6 +685,7 @@ class FileTool:
             fic = self.file_inspector_classes.get(ftype, set(),
                                                   add_on_missing=True)
             fic.add(file_inspector_class)
+        self.build_file_types_table()
 
     def register_file_class(self, file_class):
         if not issubclass(file_class, FileBase):
@@ -100,12 +702,27 @@ class FileBase:
 
 class FileResource(FileBase):
     file_type = None  # path like identifier, e.g. /text/json or /text/image/jpg
+    #: byte signatures at the start of files of this type
+    magic_bytes = ()
+
+    @classmethod
+    def sniff(cls, prefix):
+        """Content heuristic, only used if defined in the class itself.
+
+        Args:
+            prefix (bytes): first bytes of the file
+        Returns:
+            True if the content matches the file type
+        """
+        return False
 
 
 class FileInspector(FileBase):
     #: blabla blub
     #: blabla blub
     file_types = None
+    #: change the version to invalidate cached results
+    version = 0
 
     @classmethod
     def inspect_file(cls, path):
@@ -118,6 +735,62 @@ class FileInspector(FileBase):
         """
         return {}
 
+    @classmethod
+    def inspect_buffer(cls, path, buffer):
+        """Identify a file from its already opened content.
+
+        Used instead of `inspect_file` in shared buffer mode, so that
+        all inspectors work on the same memory map of the file.
+        Override this to avoid reading the file again.
+
+        Args:
+            path (str): path to file
+            buffer (memoryview): content of the file. Do not keep
+                any references to it after returning.
+        Returns:
+            dict with key value pairs of meta data
+        """
+        return cls.inspect_file(path)
+
+
+class StreamInspector(FileInspector):
+    """Inspector that processes the content of a file incrementally
+    in chunks of fixed size.
+
+    Subclasses implement the instance methods `start`, `feed` and `finish`.
+    FileTool feeds all stream inspectors of a file in a single pass
+    over its content (see FileBinary.inspect_stream).
+    """
+
+    def start(self):
+        """Reset state before the first chunk"""
+        pass
+
+    def feed(self, chunk):
+        """Process the next chunk.
+
+        Args:
+            chunk (bytes like): next part of the file content. Do not keep
+                any references to it after returning.
+        """
+        pass
+
+    def finish(self):
+        """Return the result after the last chunk.
+
+        Returns:
+            dict with key value pairs of meta data
+        """
+        return {}
+
+    @classmethod
+    def inspect_file(cls, path):
+        return FileBinary.inspect_stream(path, [cls])[0]
+
+    @classmethod
+    def inspect_buffer(cls, path, buffer):
+        return FileBinary.inspect_stream(path, [cls], buffer=buffer)[0]
+
 
 class FileBinary(FileResource, FileInspector):
     file_type = ""
@@ -134,10 +807,69 @@ class FileBinary(FileResource, FileInspector):
         """
         return {"size_bytes": cls.get_size(path)}
 
+    @classmethod
+    def inspect_buffer(cls, path, buffer):
+        return {"size_bytes": len(buffer)}
+
     @classmethod
     def get_size(cls, path):
         return os.path.getsize(path)
 
+    @classmethod
+    def iter_chunks(cls, path, chunk_size=DEFAULT_CHUNK_SIZE, buffer=None):
+        """Iterate over the content of a file.
+
+        Args:
+            path (str): path to file
+            chunk_size (int): maximum size of the chunks
+            buffer (memoryview, optional): use already opened
+                content instead of reading the file (zero copy)
+        Yields:
+            bytes like chunks
+        """
+        if buffer is not None:
+            for start in range(0, len(buffer), chunk_size):
+                yield buffer[start:start + chunk_size]
+            return
+        with open(path, "rb") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    @classmethod
+    def inspect_stream(cls, path, inspector_classes,
+                       chunk_size=DEFAULT_CHUNK_SIZE, buffer=None):
+        """Run stream inspectors in a single pass over the content of a file.
+
+        Args:
+            path (str): path to file
+            inspector_classes: list of StreamInspector subclasses
+            chunk_size (int): maximum size of the chunks
+            buffer (memoryview, optional): use already opened
+                content instead of reading the file
+        Returns:
+            list with the results (dict) of the inspectors
+        """
+        inspectors = [insp() for insp in inspector_classes]
+        for insp in inspectors:
+            insp.start()
+        for chunk in cls.iter_chunks(path, chunk_size, buffer):
+            for insp in inspectors:
+                insp.feed(chunk)
+            if buffer is not None:
+                chunk.release()
+        return [insp.finish() for insp in inspectors]
+
+
+class FileText(FileResource):
+    file_type = "text"
+
+    @classmethod
+    def sniff(cls, prefix):
+        return is_text(prefix)
+
 
 class Config:
     pass
@@ -0,0 +1,368 @@
+"""Columnar storage for many records with a shared schema."""
+import csv
+import sys
+from array import array
+from collections.abc import Mapping
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# typed arrays for exact python types, everything else is kept in a list
+TYPECODES = {int: "q", float: "d"}
+
+
+def _identity(x):
+    return x
+
+
+class Column:
+    def __init__(self):
+        """Growable column with missing values.
+
+        Values are stored in a typed array (int64 or float64) as long as all
+        values have the same type (int or float) and fit, otherwise
+        in a list. Missing cells are tracked in `mask` (1: value present).
+        A frozen column cannot be changed, but exports its values
+        without copying them (see `export`).
+        """
+        self.values = None  # type decided by the first value
+        self.mask = bytearray()
+        self.frozen = False
+
+    def __len__(self):
+        return len(self.mask)
+
+    @property
+    def typecode(self):
+        """typecode of the array, or None for a list"""
+        return getattr(self.values, "typecode", None)
+
+    def _check_frozen(self):
+        if self.frozen:
+            raise Exception("Column is frozen")
+
+    def _create(self, value):
+        typecode = TYPECODES.get(type(value))
+        if typecode:
+            self.values = array(typecode, bytes(8 * len(self.mask)))
+        else:
+            self.values = [None] * len(self.mask)
+
+    def _to_list(self):
+        self.values = self.to_list()
+
+    def pad(self, n_rows):
+        """Add missing values up to n_rows"""
+        n_missing = n_rows - len(self.mask)
+        if n_missing <= 0:
+            return
+        self._check_frozen()
+        self.mask.extend(bytes(n_missing))
+        if self.values is None:
+            return
+        if self.typecode:
+            self.values.frombytes(bytes(self.values.itemsize * n_missing))
+        else:
+            self.values.extend([None] * n_missing)
+
+    def append(self, value):
+        """Add a value"""
+        self._check_frozen()
+        if self.values is None:
+            self._create(value)
+        if self.typecode:
+            if TYPECODES.get(type(value)) == self.typecode:
+                try:
+                    self.values.append(value)
+                    self.mask.append(1)
+                    return
+                except OverflowError:
+                    pass
+            self._to_list()
+        self.values.append(value)
+        self.mask.append(1)
+
+    def append_missing(self):
+        """Add a missing value"""
+        self.pad(len(self.mask) + 1)
+
+    def append_column(self, other):
+        """Add all values of another Column"""
+        self._check_frozen()
+        if other.values is None:
+            self.pad(len(self.mask) + len(other.mask))
+            return
+        if self.values is None:
+            if other.typecode:
+                self.values = array(other.typecode,
+                                    bytes(8 * len(self.mask)))
+            else:
+                self.values = [None] * len(self.mask)
+        if self.typecode and self.typecode != other.typecode:
+            self._to_list()
+        if self.typecode or not other.typecode:
+            self.values.extend(other.values)
+        else:
+            self.values.extend(other.to_list())
+        self.mask.extend(other.mask)
+
+    def __getitem__(self, index):
+        """Return value or None if missing"""
+        if not self.mask[index]:
+            return None
+        return self.values[index]
+
+    def __setitem__(self, index, value):
+        self._check_frozen()
+        if self.values is None:
+            self._create(value)
+        if self.typecode:
+            if TYPECODES.get(type(value)) == self.typecode:
+                try:
+                    self.values[index] = value
+                    self.mask[index] = 1
+                    return
+                except OverflowError:
+                    pass
+            self._to_list()
+        self.values[index] = value
+        self.mask[index] = 1
+
+    def is_missing(self, index):
+        return not self.mask[index]
+
+    def freeze(self):
+        """Make the column read only, see `export`"""
+        self.frozen = True
+
+    def export(self):
+        """Return the values.
+
+        A copy, unless the column is frozen: a typed array cannot grow
+        while a view of it exists, so views are only returned
+        by frozen columns.
+
+        Returns:
+            array (read only memoryview if frozen) for typed columns
+            (missing values are 0), otherwise a list (missing values
+            are None). Do not modify the list of a frozen column.
+        """
+        if self.values is None:
+            return [None] * len(self.mask)
+        if not self.frozen:
+            return self.values[:]
+        if self.typecode:
+            view = memoryview(self.values)
+            # toreadonly: Python 3.8+
+            return view.toreadonly() if hasattr(view, "toreadonly") else view
+        return self.values
+
+    def has_missing(self):
+        return 0 in self.mask
+
+    def to_list(self):
+        """Return the values as list, None for missing values"""
+        if self.values is None:
+            return [None] * len(self.mask)
+        if not self.typecode:
+            return list(self.values)
+        values = self.values.tolist()
+        if self.has_missing():
+            for i, present in enumerate(self.mask):
+                if not present:
+                    values[i] = None
+        return values
+
+    def to_numpy(self):
+        """Return values as numpy array (zero copy for typed columns
+        of a frozen column) and the mask as boolean array.
+        Requires numpy.
+
+        Returns:
+            tuple (values, mask)
+        """
+        if np is None:
+            raise ImportError("numpy is required")
+        mask = np.frombuffer(self.mask, dtype=np.uint8).astype(bool)
+        if self.typecode:
+            return np.frombuffer(self.export(), dtype=self.typecode), mask
+        return np.array(self.export(), dtype=object), mask
+
+
+class RowView(Mapping):
+    """Read only dict like view of one row of a ColumnTable"""
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        column = self._table.columns[self._table.get_key(key)]
+        if self._index >= len(column) or column.is_missing(self._index):
+            raise KeyError(key)
+        return column[self._index]
+
+    def __iter__(self):
+        index = self._index
+        for key, column in self._table.columns.items():
+            if index < len(column) and not column.is_missing(index):
+                yield self._table.names[key]
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ColumnTable:
+    def __init__(self, get_key=None):
+        """Table of many records, stored column by column.
+
+        The schema (column names) is shared by all rows and keys are
+        interned, so there is no per row dict. Rows can be read
+        as dict like views.
+
+        Args:
+            get_key (function, optional): normalize column names,
+                e.g. make lowercase
+        """
+        self.get_key = get_key or _identity
+        self.columns = {}  # key -> Column
+        self.names = {}  # key -> name (first seen)
+        self.n_rows = 0
+        self.frozen = False
+
+    def __len__(self):
+        return self.n_rows
+
+    def get_column(self, name, create=False):
+        """Return Column by name.
+
+        Args:
+            name: column name
+            create (bool): if True, create missing column
+        """
+        key = self.get_key(name)
+        column = self.columns.get(key)
+        if column is None:
+            if not create:
+                raise KeyError(name)
+            if self.frozen:
+                raise Exception("Table is frozen")
+            if isinstance(key, str):
+                key = sys.intern(key)
+            column = self.columns[key] = Column()
+            self.names[key] = name
+        return column
+
+    def append(self, row):
+        """Add a row.
+
+        Args:
+            row: dict like or iterable of (name, value) pairs
+        Returns:
+            index of the new row
+        """
+        if self.frozen:
+            raise Exception("Table is frozen")
+        index = self.n_rows
+        if isinstance(row, Mapping):
+            row = row.items()
+        for name, value in row:
+            column = self.get_column(name, create=True)
+            if len(column) > index:  # duplicate (normalized) name
+                column[index] = value
+                continue
+            column.pad(index)
+            column.append(value)
+        self.n_rows += 1
+        return index
+
+    def extend(self, rows):
+        """Add rows"""
+        for row in rows:
+            self.append(row)
+
+    def append_table(self, other):
+        """Add all rows of another ColumnTable, column by column
+
+        Returns:
+            index of the first added row
+        """
+        if self.frozen:
+            raise Exception("Table is frozen")
+        index = self.n_rows
+        for key, other_column in other.columns.items():
+            column = self.get_column(other.names[key], create=True)
+            column.pad(index)
+            column.append_column(other_column)
+        self.n_rows += other.n_rows
+        return index
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.n_rows
+        if not 0 <= index < self.n_rows:
+            raise IndexError(index)
+        return RowView(self, index)
+
+    def __iter__(self):
+        for index in range(self.n_rows):
+            yield RowView(self, index)
+
+    def column(self, name):
+        """Return all values of a column, None for missing values.
+
+        Typed columns without missing values are returned as array,
+        the values are copied, unless the table is frozen
+        (see `freeze`). Otherwise the values are a list.
+        For typed values with missing values as 0 and the mask
+        use get_column(name), see Column.export and Column.to_numpy.
+
+        Args:
+            name: column name
+        Returns:
+            array, memoryview (frozen) or list
+        """
+        column = self.get_column(name)
+        column.pad(self.n_rows)
+        if column.typecode and not column.has_missing():
+            return column.export()
+        return column.to_list()
+
+    def freeze(self):
+        """Make the table read only.
+
+        Afterwards, `column` returns typed values without copying them
+        (if there are no missing values), adding rows or columns
+        raises an Exception.
+        """
+        for column in self.columns.values():
+            column.pad(self.n_rows)
+            column.freeze()
+        self.frozen = True
+
+    def to_csv(self, file, missing="", **kwargs):
+        """Write table as csv with a header row.
+
+        Args:
+            file: path or text file object
+            missing: value written for missing cells
+            kwargs: passed on to csv.writer
+        """
+        if isinstance(file, str):
+            with open(file, "w", encoding="utf-8", newline="") as file:
+                return self.to_csv(file, missing=missing, **kwargs)
+        columns = list(self.columns.values())
+        for column in columns:
+            column.pad(self.n_rows)
+        writer = csv.writer(file, **kwargs)
+        writer.writerow(self.names.values())
+        for index in range(self.n_rows):
+            writer.writerow([
+                missing if column.is_missing(index) else column[index]
+                for column in columns
+            ])
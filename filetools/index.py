@@ -0,0 +1,105 @@
+import os
+import json
+import sqlite3
+
+DEFAULT_COMMIT_EVERY = 1000
+
+
+class FileIndex:
+    def __init__(self, path, commit_every=DEFAULT_COMMIT_EVERY):
+        """Persistent (SQLite) index of inspected files.
+
+        Stores path, stat fingerprint and metadata of every file,
+        see FileTool.rescan.
+
+        Args:
+            path (str): path of the index database file
+            commit_every (int): number of writes per transaction
+        """
+        self.path = str(path)
+        self.commit_every = commit_every
+        self._n_writes = 0
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL, "
+            "meta TEXT NOT NULL)"
+        )
+        self._connection.commit()
+
+    def get_fingerprints(self, root):
+        """Return fingerprints of all files below a directory.
+
+        Args:
+            root (str): absolute path of the directory
+        Returns:
+            dict path -> fingerprint (size, mtime_ns, inode)
+        """
+        prefix = os.path.join(root, "")
+        # all paths starting with prefix, using the primary key index
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        rows = self._connection.execute(
+            "SELECT path, size, mtime_ns, inode FROM files "
+            "WHERE path >= ? AND path < ?", (prefix, upper)
+        )
+        return {row[0]: row[1:] for row in rows}
+
+    def get(self, path):
+        """Return stored metadata of a file (or None)"""
+        row = self._connection.execute(
+            "SELECT meta FROM files WHERE path = ?", (str(path),)
+        ).fetchone()
+        if row:
+            return json.loads(row[0])
+
+    def put(self, path, fingerprint, meta):
+        """Add or replace a file.
+
+        Args:
+            path (str): path of the file
+            fingerprint (tuple): (size, mtime_ns, inode)
+            meta: dict like metadata
+        """
+        meta = json.dumps(dict(meta.items()), default=str)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+            (str(path),) + tuple(fingerprint) + (meta,)
+        )
+        self._count_writes(1)
+
+    def delete(self, paths):
+        """Remove files.
+
+        Args:
+            paths: iterable of paths
+        """
+        paths = [(str(p),) for p in paths]
+        self._connection.executemany("DELETE FROM files WHERE path = ?",
+                                     paths)
+        self._count_writes(len(paths))
+
+    def _count_writes(self, n):
+        self._n_writes += n
+        if self._n_writes >= self.commit_every:
+            self.flush()
+
+    def __len__(self):
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def flush(self):
+        """Commit pending writes"""
+        self._connection.commit()
+        self._n_writes = 0
+
+    def close(self):
+        """Commit pending writes and close the database"""
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,85 @@
+"""Stream inspectors for common metadata.
+
+They are not registered by default, e.g. use
+``file_tool.register_file_class(Sha256Inspector)``.
+"""
+import hashlib
+from collections import Counter
+from .classes import StreamInspector
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class HashInspector(StreamInspector):
+    file_types = [""]
+    #: name of the algorithm in hashlib, also used as key of the result
+    hash_name = None
+
+    def start(self):
+        self._hash = hashlib.new(self.hash_name)
+
+    def feed(self, chunk):
+        self._hash.update(chunk)
+
+    def finish(self):
+        return {self.hash_name: self._hash.hexdigest()}
+
+
+class Md5Inspector(HashInspector):
+    hash_name = "md5"
+
+
+class Sha256Inspector(HashInspector):
+    hash_name = "sha256"
+
+
+class Blake2bInspector(HashInspector):
+    hash_name = "blake2b"
+
+
+class LineCountInspector(StreamInspector):
+    """Number of lines (a last line without line break is counted)"""
+
+    file_types = [""]
+
+    def start(self):
+        self._n_lines = 0
+        self._last_byte = None
+
+    def feed(self, chunk):
+        chunk = bytes(chunk)
+        self._n_lines += chunk.count(b"\n")
+        self._last_byte = chunk[-1:] or self._last_byte
+
+    def finish(self):
+        n_lines = self._n_lines
+        if self._last_byte not in (None, b"\n"):
+            n_lines += 1
+        return {"line_count": n_lines}
+
+
+class ByteHistogramInspector(StreamInspector):
+    """Number of occurrences of every byte value (list of 256 counts)"""
+
+    file_types = [""]
+
+    def start(self):
+        if np is not None:
+            self._counts = np.zeros(256, dtype=np.int64)
+        else:
+            self._counts = Counter()
+
+    def feed(self, chunk):
+        if np is not None:
+            self._counts += np.bincount(np.frombuffer(chunk, dtype=np.uint8),
+                                        minlength=256)
+        else:
+            self._counts.update(bytes(chunk))
+
+    def finish(self):
+        if np is not None:
+            return {"byte_histogram": self._counts.tolist()}
+        return {"byte_histogram": [self._counts[i] for i in range(256)]}
@@ -0,0 +1,700 @@
+"""Streaming normalization of nested records into relational tables.
+
+Every dict becomes a row with an automatic id. Nested dicts and lists
+become rows in child tables with a foreign key to the parent row.
+Rows are emitted in batches to a sink, so memory does not depend on
+the size of the input.
+"""
+import os
+import re
+import csv
+import json
+import sqlite3
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 2**16
+ROOT_TABLE = "root"
+ID_COLUMN = "_id"
+VALUE_COLUMN = "value"
+TABLE_SEPARATOR = "."
+
+_KEY_ESCAPES = {"%": "%25", TABLE_SEPARATOR: "%2E"}
+_KEY_UNESCAPES = {v: k for k, v in _KEY_ESCAPES.items()}
+_ESCAPED_PATTERN = re.compile("|".join(_KEY_UNESCAPES))
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+def iter_json_array(file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Decode the elements of a top level JSON array one by one.
+
+    Only the current element is kept in memory. If the document is not
+    an array, the document itself is the only element.
+
+    Args:
+        file: path or text file object
+        chunk_size (int): number of characters read at once
+    Yields:
+        decoded elements
+    Examples:
+        >>> import io
+        >>> list(iter_json_array(io.StringIO('[1, {"a": [2]}, "x"]'),
+        ...                      chunk_size=2))
+        [1, {'a': [2]}, 'x']
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, encoding="utf-8") as file:
+            yield from iter_json_array(file, chunk_size=chunk_size)
+        return
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def skip_whitespace():
+        # return position of next non whitespace character, read if needed
+        nonlocal buffer, pos, eof
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            buffer, pos = file.read(chunk_size), 0
+            eof = not buffer
+
+    skip_whitespace()
+    if buffer[pos:pos + 1] != "[":
+        # not an array
+        yield json.loads(buffer[pos:] + file.read())
+        return
+    pos += 1
+    expect_value = True
+    empty = True
+    while True:
+        skip_whitespace()
+        if eof:
+            raise ValueError("Unexpected end of JSON array")
+        char = buffer[pos]
+        if char == "]":
+            if expect_value and not empty:
+                raise ValueError("Trailing ',' before character %d" % pos)
+            pos += 1
+            skip_whitespace()
+            if not eof:
+                raise ValueError("Extra data at character %d" % pos)
+            return
+        if not expect_value:
+            if char != ",":
+                raise ValueError("Expected ',' at character %d" % pos)
+            pos += 1
+            expect_value = True
+            continue
+        # decode next element, read more until it is complete
+        read_size = chunk_size
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # a number could be cut off at the end of the buffer
+                if eof or (end < len(buffer)
+                           and buffer[end] not in _NUMBER_CHARS):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            chunk = file.read(read_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            read_size *= 2  # avoid quadratic cost for large elements
+        pos = end
+        expect_value = False
+        empty = False
+        yield value
+
+
+def escape_key(key):
+    """Escape the separator (and %) in a key for use in a table name
+
+    Examples:
+        >>> escape_key("a.b%")
+        'a%2Eb%25'
+    """
+    key = str(key)
+    for char, escaped in _KEY_ESCAPES.items():
+        key = key.replace(char, escaped)
+    return key
+
+
+def unescape_key(name):
+    """Inverse of escape_key
+
+    Examples:
+        >>> unescape_key("a%2Eb%25")
+        'a.b%'
+    """
+    return _ESCAPED_PATTERN.sub(lambda m: _KEY_UNESCAPES[m.group()], name)
+
+
+def is_escaped_column(name, fixed_columns):
+    """Return True if name is a fixed column name followed by
+    one or more underscores, see RelationalNormalizer"""
+    return any(
+        name.startswith(column) and len(name) > len(column)
+        and not name[len(column):].strip("_")
+        for column in fixed_columns
+    )
+
+
+class _Table:
+    __slots__ = ("name", "columns", "column_index", "parent", "children",
+                 "n_fixed", "next_id", "rows")
+
+    def __init__(self, name, parent=None, id_column=ID_COLUMN):
+        self.name = name
+        self.parent = parent
+        self.children = {}
+        self.columns = [id_column]
+        if parent is not None:
+            self.columns.append("%s_id" % parent.name)
+        self.n_fixed = len(self.columns)
+        self.column_index = {}  # key -> index of column
+        self.next_id = 1
+        self.rows = []
+
+    def get_column_index(self, key):
+        index = self.column_index.get(key)
+        if index is None:
+            name = key
+            fixed_columns = self.columns[:self.n_fixed]
+            if isinstance(key, str) and (
+                    key in fixed_columns
+                    or is_escaped_column(key, fixed_columns)):
+                # keep keys apart from the fixed columns: "_id" -> "_id_"
+                name = key + "_"
+            index = self.column_index[key] = len(self.columns)
+            self.columns.append(name)
+        return index
+
+
+class RelationalNormalizer:
+    def __init__(self, sink, root_name=ROOT_TABLE, id_column=ID_COLUMN,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        """Split nested records into relational tables, row by row.
+
+        * a record (dict) is a row in the root table
+        * every row gets an automatic id (per table, starting at 1)
+        * a dict or a list at key `k` of a row in table `t` becomes rows in
+          table `t.k`, with a foreign key column `t_id`. "." and "%" in
+          `k` are escaped (see escape_key), so every table name
+          belongs to one path. Keys with the same string (1 and "1")
+          share a table.
+        * keys that equal the id or foreign key column of a table,
+          optionally followed by underscores, get another underscore,
+          e.g. a key "_id" becomes the column "_id_"
+        * values in lists become rows with a column `value`
+        * lists of lists are handled as batches of rows
+
+        The traversal uses an explicit stack (no recursion limit).
+        Rows are passed on to the sink every `batch_size` rows per table
+        and on `flush`, padded to the current schema of the table.
+        Columns are only ever appended to a table's schema.
+
+        Args:
+            sink: object with methods write(name, columns, rows)
+                and close(), e.g. CsvSink, SqliteSink or CallbackSink
+            root_name (str): name of the root table
+            id_column (str): name of the id column in all tables
+            batch_size (int): number of rows per table in a batch
+        Examples:
+            >>> sink = MemorySink()
+            >>> with RelationalNormalizer(sink) as normalizer:
+            ...     normalizer.add({"a": 1, "b": [{"c": 2}, {"c": 3}]})
+            1
+            >>> sink.tables["root.b"]["data"]
+            [(1, 1, 2), (2, 1, 3)]
+        """
+        self.sink = sink
+        self.id_column = id_column
+        self.batch_size = batch_size
+        self.root = _Table(root_name, id_column=id_column)
+        self._tables = [self.root]
+        self._tables_by_name = {root_name: self.root}
+
+    def _get_child(self, table, key):
+        child = table.children.get(key)
+        if child is None:
+            # keys with the same name (1 and "1") share a table
+            name = "%s%s%s" % (table.name, TABLE_SEPARATOR, escape_key(key))
+            child = self._tables_by_name.get(name)
+            if child is None:
+                child = self._tables_by_name[name] = _Table(
+                    name, parent=table, id_column=self.id_column)
+                self._tables.append(child)
+            table.children[key] = child
+        return child
+
+    def _add_row(self, table, row):
+        table.rows.append(row)
+        if len(table.rows) >= self.batch_size:
+            self._flush_table(table)
+
+    def add(self, record):
+        """Add a record to the root table (and its children).
+
+        Args:
+            record: dict, list or value
+        Returns:
+            id of the (last) row in the root table
+        """
+        root_id = None
+        stack = [(self.root, record, None)]
+        while stack:
+            table, obj, parent_id = stack.pop()
+            if isinstance(obj, (list, tuple)):
+                stack.extend((table, item, parent_id)
+                             for item in reversed(obj))
+                continue
+            row_id = table.next_id
+            table.next_id += 1
+            row = [row_id]
+            if parent_id is not None:
+                row.append(parent_id)
+            if isinstance(obj, dict):
+                nested = []
+                for key, value in obj.items():
+                    if isinstance(value, (dict, list, tuple)):
+                        nested.append((self._get_child(table, key), value,
+                                       row_id))
+                        continue
+                    index = table.get_column_index(key)
+                    if index >= len(row):
+                        row.extend([None] * (index + 1 - len(row)))
+                    row[index] = value
+                stack.extend(reversed(nested))
+            else:
+                index = table.get_column_index(VALUE_COLUMN)
+                row.extend([None] * (index + 1 - len(row)))
+                row[index] = obj
+            self._add_row(table, row)
+            if table is self.root:
+                root_id = row_id
+        return root_id
+
+    def add_many(self, records):
+        """Add records, see add"""
+        for record in records:
+            self.add(record)
+
+    def _flush_table(self, table):
+        if not table.rows:
+            return
+        n_columns = len(table.columns)
+        rows = [
+            tuple(row) + (None,) * (n_columns - len(row))
+            for row in table.rows
+        ]
+        table.rows = []
+        self.sink.write(table.name, list(table.columns), rows)
+
+    def flush(self):
+        """Pass all buffered rows on to the sink"""
+        for table in self._tables:
+            self._flush_table(table)
+
+    def close(self):
+        """Flush and close the sink"""
+        self.flush()
+        self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class CallbackSink:
+    def __init__(self, callback):
+        """Sink calling callback(name, columns, rows) for every batch"""
+        self.callback = callback
+
+    def write(self, name, columns, rows):
+        self.callback(name, columns, rows)
+
+    def close(self):
+        pass
+
+
+class MemorySink:
+    def __init__(self):
+        """Sink keeping all tables in memory.
+
+        `tables` is a dict: name -> {name, schema, data}, data is
+        a list of tuples (missing values are None).
+        """
+        self.tables = {}
+
+    def write(self, name, columns, rows):
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = {"name": name, "schema": [],
+                                         "data": []}
+        table["schema"] = columns
+        table["data"].extend(rows)
+
+    def close(self):
+        # pad rows written before columns were added
+        for table in self.tables.values():
+            n_columns = len(table["schema"])
+            table["data"] = [
+                row + (None,) * (n_columns - len(row))
+                for row in table["data"]
+            ]
+
+
+class CsvSink:
+    def __init__(self, directory, **kwargs):
+        """Sink writing one csv file `<name>.csv` per table.
+
+        If columns are added after the header was written,
+        the file is rewritten (streaming) on close.
+
+        Args:
+            directory (str): existing output directory
+            kwargs: passed on to csv.writer
+        """
+        self.directory = str(directory)
+        self.kwargs = kwargs
+        self._files = {}  # name -> (file, writer, header, columns)
+
+    def get_path(self, name):
+        return os.path.join(self.directory, "%s.csv" % name)
+
+    def write(self, name, columns, rows):
+        entry = self._files.get(name)
+        if entry is None:
+            file = open(self.get_path(name), "w", encoding="utf-8",
+                        newline="")
+            writer = csv.writer(file, **self.kwargs)
+            writer.writerow(columns)
+            entry = self._files[name] = [file, writer, columns, columns]
+        entry[3] = columns
+        entry[1].writerows(rows)
+
+    def close(self):
+        for name, (file, _, header, columns) in self._files.items():
+            file.close()
+            if len(header) < len(columns):
+                self._rewrite(name, columns)
+        self._files = {}
+
+    def _rewrite(self, name, columns):
+        path = self.get_path(name)
+        tmp_path = path + ".tmp"
+        n_columns = len(columns)
+        with open(path, encoding="utf-8", newline="") as file_in:
+            with open(tmp_path, "w", encoding="utf-8",
+                      newline="") as file_out:
+                reader = csv.reader(file_in, **self.kwargs)
+                writer = csv.writer(file_out, **self.kwargs)
+                next(reader)  # old header
+                writer.writerow(columns)
+                for row in reader:
+                    writer.writerow(row + [""] * (n_columns - len(row)))
+        os.replace(tmp_path, path)
+
+
+def quote_identifier(name):
+    """Quote a table or column name for SQL
+
+    Examples:
+        >>> quote_identifier('a"b')
+        '"a""b"'
+    """
+    return '"%s"' % str(name).replace('"', '""')
+
+
+class SqliteSink:
+    def __init__(self, path, primary_keys=None):
+        """Sink writing one SQLite table per table.
+
+        Tables are created on the first batch, new columns are added
+        with ALTER TABLE. Every batch is inserted with executemany in
+        one transaction.
+
+        Args:
+            path (str): path of the database file
+            primary_keys (dict, optional): table name -> primary key column.
+                Rows with an existing primary key replace the old row.
+        """
+        self.path = str(path)
+        self.primary_keys = primary_keys or {}
+        self.connection = sqlite3.connect(self.path)
+        self._columns = {}  # name -> number of columns
+
+    def write(self, name, columns, rows):
+        table = quote_identifier(name)
+        primary_key = self.primary_keys.get(name)
+        with self.connection:
+            n_columns = self._columns.get(name)
+            if n_columns is None:
+                self.connection.execute("CREATE TABLE %s (%s)" % (
+                    table, ", ".join(
+                        quote_identifier(c)
+                        + (" PRIMARY KEY" if c == primary_key else "")
+                        for c in columns)))
+            else:
+                for column in columns[n_columns:]:
+                    self.connection.execute(
+                        "ALTER TABLE %s ADD COLUMN %s" % (
+                            table, quote_identifier(column)))
+            self._columns[name] = len(columns)
+            self.connection.executemany(
+                "INSERT %sINTO %s VALUES (%s)" % (
+                    "OR REPLACE " if primary_key else "", table,
+                    ", ".join("?" * len(columns))), rows)
+
+    def create_indexes(self, suffix="_id"):
+        """Create indexes on all (foreign key) columns ending with suffix.
+
+        Creating them once after loading is faster than updating them
+        on every insert.
+        """
+        with self.connection:
+            for name in self._columns:
+                table = quote_identifier(name)
+                columns = [row[1] for row in self.connection.execute(
+                    "PRAGMA table_info(%s)" % table)]
+                for column in columns:
+                    if not column.endswith(suffix) or \
+                            column == self.primary_keys.get(name):
+                        continue
+                    self.connection.execute(
+                        "CREATE INDEX IF NOT EXISTS %s ON %s (%s)" % (
+                            quote_identifier("%s__%s" % (name, column)),
+                            table, quote_identifier(column)))
+
+    def close(self):
+        self.connection.close()
+
+
+class _Link:
+    __slots__ = ("key", "child", "foreign_key", "value_column", "row_ids",
+                 "index")
+
+    def __init__(self, key, child, foreign_key, value_column=None,
+                 row_ids=None):
+        self.key = key
+        self.child = child
+        self.foreign_key = foreign_key
+        self.value_column = value_column
+        self.row_ids = row_ids  # rows with a reference (None: all)
+        self.index = None  # foreign key -> rows of child
+
+
+class Denormalizer:
+    def __init__(self, tables, id_column=ID_COLUMN):
+        """Rebuild nested documents from relational tables.
+
+        Relations are registered with add_children (rows of a child
+        table with a foreign key to the parent row) and add_reference
+        (a column holds the id of a row in another table). Every relation
+        is joined through a hash index, built once, so building all
+        documents is linear in the total number of rows.
+
+        The first column of every table is its id. Columns named
+        `id_column` (automatic ids), foreign keys and missing values
+        are not part of the documents.
+
+        Args:
+            tables: iterable of {name, schema, data}, see
+                tools.structure_to_relational_tables
+            id_column (str): name of automatic id columns
+        """
+        self.tables = {t["name"]: t for t in tables}
+        self.id_column = id_column
+        self._children = {}  # table -> [_Link]
+        self._references = {}  # table -> {column: _Link}
+        self._hidden = {}  # table -> set of columns
+        self._keys = {}  # table -> {column: key in documents}
+        self._plans = None
+
+    def add_children(self, parent, child, key, foreign_key,
+                     value_column=None):
+        """Nest rows of child as a list at `key` of the parent documents.
+
+        Args:
+            parent (str): name of parent table
+            child (str): name of child table
+            key: key of the list in the parent documents
+            foreign_key (str): column in child with the parent id
+            value_column (str, optional): list only the values of
+                this column instead of documents
+        """
+        self._children.setdefault(parent, []).append(
+            _Link(key, child, foreign_key, value_column))
+        self.hide_column(child, foreign_key)
+        self._plans = None
+
+    def add_reference(self, table, column, ref_table, row_ids=None):
+        """Replace the id in `column` by the document of that row.
+
+        Args:
+            table (str): name of table
+            column (str): column with ids of rows in ref_table
+            ref_table (str): name of referenced table
+            row_ids (set, optional): ids of the rows in which `column`
+                holds a reference, other rows hold values.
+                Default: all rows
+        """
+        self._references.setdefault(table, {})[column] = _Link(
+            column, ref_table, None, row_ids=row_ids)
+        self._plans = None
+
+    def hide_column(self, table, column):
+        """Do not include column in the documents"""
+        self._hidden.setdefault(table, set()).add(column)
+        self._plans = None
+
+    def rename_column(self, table, column, key):
+        """Use `key` instead of the column name in the documents"""
+        self._keys.setdefault(table, {})[column] = key
+        self._plans = None
+
+    @classmethod
+    def from_normalized(cls, tables, id_column=ID_COLUMN):
+        """Create Denormalizer for the tables of RelationalNormalizer.
+
+        Child tables become lists. Tables with only a `value` column
+        become lists of values. Nested dicts also come back as lists
+        (with one document), the normalized tables do not tell them apart.
+        Escaped keys (table names and columns) are restored.
+
+        Examples:
+            >>> from filetools.tools import structure_to_relational_tables
+            >>> tables = structure_to_relational_tables(
+            ...     [{"a": 1, "b": [{"c": 2}, {"c": 3}], "d": ["x"]}])
+            >>> list(Denormalizer.from_normalized(tables).iter_documents())
+            [{'a': 1, 'b': [{'c': 2}, {'c': 3}], 'd': ['x']}]
+        """
+        tables = list(tables)
+        denormalizer = cls(tables, id_column=id_column)
+        names = set(denormalizer.tables)
+        for table in tables:
+            schema = table["schema"]
+            # only a child table has a foreign key, named after its parent
+            parent, _, key = table["name"].rpartition(TABLE_SEPARATOR)
+            foreign_key = "%s_id" % parent
+            is_child = parent in names and schema[1:2] == [foreign_key]
+            fixed_columns = [id_column]
+            if is_child:
+                fixed_columns.append(foreign_key)
+            for column in schema[1:]:
+                if is_escaped_column(column, fixed_columns):
+                    denormalizer.rename_column(table["name"], column,
+                                               column[:-1])
+            if not is_child:
+                continue
+            key = unescape_key(key)
+            value_column = None
+            if schema[2:] == [VALUE_COLUMN]:
+                value_column = VALUE_COLUMN
+            denormalizer.add_children(parent, table["name"], key,
+                                      foreign_key, value_column)
+        return denormalizer
+
+    def _get_plans(self):
+        """Build the indexes and, per table, what goes into a document"""
+        if self._plans is not None:
+            return self._plans
+        row_indexes = {}  # table -> id -> row
+
+        def get_row_index(name):
+            if name not in row_indexes:
+                row_indexes[name] = {
+                    row[0]: row for row in self.tables[name]["data"]
+                }
+            return row_indexes[name]
+
+        plans = {}
+        for name, table in self.tables.items():
+            schema = table["schema"]
+            hidden = self._hidden.get(name, ())
+            references = self._references.get(name, {})
+            keys = self._keys.get(name, {})
+            columns = []  # (position, key, reference index)
+            for i, column in enumerate(schema):
+                if column == self.id_column or column in hidden:
+                    continue
+                link = references.get(column)
+                if link is not None:
+                    link.index = get_row_index(link.child)
+                columns.append((i, keys.get(column, column), link))
+            children = self._children.get(name, [])
+            for link in children:
+                child_schema = self.tables[link.child]["schema"]
+                position = child_schema.index(link.foreign_key)
+                value_position = None
+                if link.value_column is not None:
+                    value_position = child_schema.index(link.value_column)
+                index = {}
+                for row in self.tables[link.child]["data"]:
+                    index.setdefault(row[position], []).append(row)
+                link.index = (index, value_position)
+            plans[name] = (columns, children)
+        self._plans = plans
+        return plans
+
+    def get_document(self, table, row):
+        """Return the nested document of a row of a table"""
+        plans = self._get_plans()
+        result = {}
+        stack = [(table, row, result)]
+        while stack:
+            table, row, document = stack.pop()
+            columns, children = plans[table]
+            for i, column, link in columns:
+                value = row[i]
+                if value is None:
+                    continue
+                if link is not None and (link.row_ids is None
+                                         or row[0] in link.row_ids):
+                    ref_row = link.index.get(value)
+                    if ref_row is not None:
+                        value = {}
+                        stack.append((link.child, ref_row, value))
+                document[column] = value
+            row_id = row[0]
+            for link in children:
+                index, value_position = link.index
+                rows = index.get(row_id)
+                if not rows:
+                    continue
+                if value_position is not None:
+                    document[link.key] = [r[value_position] for r in rows]
+                    continue
+                documents = document[link.key] = []
+                for child_row in rows:
+                    child_document = {}
+                    documents.append(child_document)
+                    stack.append((link.child, child_row, child_document))
+        return result
+
+    def iter_documents(self, table=ROOT_TABLE):
+        """Yield the documents of all rows of a table (one by one)"""
+        for row in self.tables[table]["data"]:
+            yield self.get_document(table, row)
+
+
+def normalize_json_file(file, sink, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """Normalize the elements of a (large) JSON array file.
+
+    Args:
+        file: path or text file object
+        sink: see RelationalNormalizer
+        chunk_size (int): see iter_json_array
+        kwargs: passed on to RelationalNormalizer
+    """
+    with RelationalNormalizer(sink, **kwargs) as normalizer:
+        normalizer.add_many(iter_json_array(file, chunk_size=chunk_size))
@@ -0,0 +1,189 @@
+import codecs
+import hashlib
+
+DEFAULT_PREFIX_SIZE = 8192
+
+
+def get_parent_file_type(file_type, file_types):
+    """Return the closest ancestor of file_type that is in file_types.
+
+    Args:
+        file_type (str): file type identifier like "text/csv"
+        file_types: collection of file types
+    Returns:
+        file type of the ancestor or "" (root)
+    """
+    while file_type:
+        file_type = file_type.rpartition("/")[0]
+        if file_type in file_types:
+            return file_type
+    return ""
+
+
+def get_depth(file_type):
+    """Return the number of levels of a file type ("" is 0)"""
+    return file_type.count("/") + 1 if file_type else 0
+
+
+def is_text(prefix):
+    """Heuristic: prefix is not empty, has no NUL bytes and is valid UTF-8
+
+    Examples:
+        >>> is_text(b"hello")
+        True
+        >>> is_text(b"\\x89PNG\\r\\n\\x1a\\n\\x00\\x00")
+        False
+        >>> is_text(b"caf\\xc3")  # truncated multibyte character
+        True
+    """
+    if not prefix or b"\x00" in prefix:
+        return False
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+class ContentSniffer:
+    def __init__(self, prefix_size=DEFAULT_PREFIX_SIZE):
+        """Identify file types from the first bytes of a file.
+
+        Byte signatures (magic numbers) are stored in a trie, so a single
+        walk over the prefix finds all matching signatures. Starting from the
+        deepest of those file types, content heuristics of the sub types
+        are tried to go further down the hierarchy (e.g. "" -> "text"
+        -> "text/csv").
+
+        Args:
+            prefix_size (int): number of bytes read from a file
+        """
+        self.prefix_size = prefix_size
+        self.trie = {}  # byte -> node, None -> file types
+        self.heuristics = {}  # file type -> function(prefix)
+        self.children = {}  # parent file type -> [file type]
+        self.version = ""
+
+    @classmethod
+    def from_resource_classes(cls, resource_classes, **kwargs):
+        """Create sniffer from the signatures and heuristics of
+        FileResource classes.
+
+        Args:
+            resource_classes: iterable of FileResource subclasses
+            kwargs: passed on to the constructor
+        Returns:
+            ContentSniffer
+        """
+        sniffer = cls(**kwargs)
+        for resource_class in resource_classes:
+            for signature in resource_class.magic_bytes:
+                sniffer.add_signature(resource_class.file_type, signature)
+            # only use heuristic if defined in the class itself
+            if "sniff" in resource_class.__dict__:
+                sniffer.add_heuristic(resource_class.file_type,
+                                      resource_class.sniff)
+        sniffer.build()
+        return sniffer
+
+    def add_signature(self, file_type, signature):
+        """Add a magic byte signature.
+
+        Args:
+            file_type (str): file type identifier
+            signature (bytes): leading bytes of files of this type
+        """
+        node = self.trie
+        for byte in signature:
+            node = node.setdefault(byte, {})
+        node.setdefault(None, []).append(file_type)
+
+    def add_heuristic(self, file_type, function):
+        """Add a content heuristic.
+
+        Args:
+            file_type (str): file type identifier
+            function: called with the prefix (bytes), returns True
+                if the content matches the file type. It is only called
+                if the parent file type has already been identified.
+        """
+        self.heuristics[file_type] = function
+
+    def build(self):
+        """Link heuristics into the hierarchy, must be called after
+        adding signatures or heuristics"""
+        signatures = sorted(self.iter_signatures())
+        file_types = set(self.heuristics)
+        file_types.update(ftype for _, ftype in signatures)
+        self.children = {}
+        for file_type in self.heuristics:
+            parent = get_parent_file_type(file_type, file_types)
+            self.children.setdefault(parent, []).append(file_type)
+        # deeper types first
+        for child_types in self.children.values():
+            child_types.sort(key=get_depth, reverse=True)
+        # identifies the rules, e.g. for cached results
+        self.version = hashlib.md5(repr((
+            self.prefix_size,
+            signatures,
+            sorted((k, getattr(v, "__qualname__", repr(v)))
+                   for k, v in self.heuristics.items())
+        )).encode()).hexdigest()
+
+    def iter_signatures(self):
+        """Yield tuples (signature, file type) of all signatures"""
+        stack = [(b"", self.trie)]
+        while stack:
+            signature, node = stack.pop()
+            for key, child in node.items():
+                if key is None:
+                    for file_type in child:
+                        yield signature, file_type
+                else:
+                    stack.append((signature + bytes([key]), child))
+
+    def get_file_types(self):
+        """Return the set of all file types `sniff` can return"""
+        file_types = {""}
+        file_types.update(self.heuristics)
+        file_types.update(ftype for _, ftype in self.iter_signatures())
+        return file_types
+
+    def sniff(self, prefix):
+        """Identify file type from content.
+
+        Args:
+            prefix (bytes): first bytes of the file
+        Returns:
+            file type (str)
+        """
+        # longest/deepest signature match
+        file_type = ""
+        node = self.trie
+        for byte in prefix:
+            node = node.get(byte)
+            if node is None:
+                break
+            for ftype in node.get(None, ()):
+                if get_depth(ftype) >= get_depth(file_type):
+                    file_type = ftype
+        # go down the hierarchy with heuristics
+        while True:
+            for ftype in self.children.get(file_type, ()):
+                if self.heuristics[ftype](prefix):
+                    file_type = ftype
+                    break
+            else:
+                return file_type
+
+    def sniff_file(self, path):
+        """Identify file type from the first bytes of a file.
+
+        Args:
+            path: path to file
+        Returns:
+            file type (str)
+        """
+        with open(path, "rb") as file:
+            prefix = file.read(self.prefix_size)
+        return self.sniff(prefix)
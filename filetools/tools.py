@@ -1,12 +1,29 @@
 
 import re
+import hashlib
+import fnmatch
 import logging
+import warnings
+from functools import lru_cache
+from weakref import WeakKeyDictionary
 from collections import OrderedDict
+from collections.abc import (
+    Mapping,
+    MutableMapping,
+    KeysView,
+    ItemsView,
+)
+from .columns import ColumnTable
+from .relational import RelationalNormalizer, MemorySink
 
 FOLD_SEPARATOR = "."
 FOLD_LIST_INDICATOR = "#"
 
 
+def _identity(x):
+    return x
+
+
 class Dict:
     def __init__(self, allow_overwrite=True, get_key=None):
         """Modified dictionary
@@ -17,7 +34,7 @@ class Dict:
                  make lowercase
         """
         self._data = OrderedDict()
-        self.get_key = get_key or (lambda x: x)
+        self.get_key = get_key or _identity
         self.allow_overwrite = allow_overwrite
 
     def __getitem__(self, key):
@@ -82,9 +99,186 @@ class Dict:
         return len(self._data)
 
 
+# get_key -> {key: normalized key}
+_key_caches = WeakKeyDictionary()
+
+
+class _FastKeysView(KeysView):
+    def __iter__(self):
+        return iter(self._mapping._keys.values())
+
+
+class _FastItemsView(ItemsView):
+    def __iter__(self):
+        mapping = self._mapping
+        return zip(mapping._keys.values(), mapping._values.values())
+
+
+class FastDict(MutableMapping):
+    #: maximum number of memoized normalized keys
+    key_cache_size = 2**16
+
+    def __init__(self, allow_overwrite=True, get_key=None):
+        """Modified dictionary, same semantics as Dict, but faster.
+
+        Original keys and values are kept in two parallel dicts
+        (no tuple per entry) and normalized str keys are memoized
+        (per get_key function, shared by all instances, so get_key
+        must always return the same result for the same key).
+        `str.lower` (and no get_key) are called directly.
+
+        Args:
+            allow_overwrite (bool): if False: throws error if key
+                already exists. Default: True
+            get_key (function, optional): modify key before lookup, e.g.
+                 make lowercase
+        Examples:
+            >>> d = FastDict(get_key=str.lower)
+            >>> d["Key"] = 1
+            >>> d["KEY"], list(d.items())
+            (1, [('Key', 1)])
+        """
+        self._keys = {}  # normalized key -> original key
+        self._values = {}  # normalized key -> value
+        self.allow_overwrite = allow_overwrite
+        self.get_key = get_key
+
+    @property
+    def get_key(self):
+        return self._get_key
+
+    @get_key.setter
+    def get_key(self, get_key):
+        self._get_key = get_key or _identity
+        # memoized keys are shared by all instances using the same get_key
+        try:
+            self._key_cache = _key_caches.setdefault(self._get_key, {})
+        except TypeError:  # not weak referenceable
+            self._key_cache = {}
+        if self._get_key in (_identity, str.lower):
+            self._normalize = self._get_key
+        else:
+            self._normalize = self._cached_key
+
+    def _cached_key(self, key):
+        if type(key) is not str:
+            # equal keys of different types (1, 1.0, True) would share
+            # a memoized entry: only str keys are memoized
+            return self._get_key(key)
+        try:
+            return self._key_cache[key]
+        except KeyError:
+            key2 = self._get_key(key)
+            if len(self._key_cache) < self.key_cache_size:
+                self._key_cache[key] = key2
+            return key2
+
+    def __getstate__(self):
+        return (self._keys, self._values, self.allow_overwrite,
+                self._get_key)
+
+    def __setstate__(self, state):
+        self._keys, self._values, self.allow_overwrite, get_key = state
+        self.get_key = get_key
+
+    def __getitem__(self, key):
+        return self._values[self._normalize(key)]
+
+    def __contains__(self, key):
+        return self._normalize(key) in self._values
+
+    def __delitem__(self, key):
+        key2 = self._normalize(key)
+        if not self.allow_overwrite:
+            raise Exception("Not allowed to remove items")
+        del self._values[key2]
+        del self._keys[key2]
+
+    def __setitem__(self, key, value):
+        key2 = self._normalize(key)
+        if not self.allow_overwrite and key2 in self._values:
+            raise Exception("Duplicate key: %s" % key2)
+        self._keys[key2] = key
+        self._values[key2] = value
+
+    def __iter__(self):
+        return iter(self._keys.values())
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, dict(self.items()))
+
+    def get(self, key, default=None, add_on_missing=False):
+        """Get value from dictionary
+
+        Args:
+            key: key
+            default: default value
+            add_on_missing (boolean): if True: add item if key is missing
+        Returns:
+            value or default
+        """
+        key2 = self._normalize(key)
+        try:
+            return self._values[key2]
+        except KeyError:
+            if add_on_missing:
+                self[key] = default
+            return default
+
+    def clear(self):
+        if not self.allow_overwrite:
+            raise Exception("Not allowed to remove items")
+        self._keys.clear()
+        self._values.clear()
+
+    def keys(self):
+        return _FastKeysView(self)
+
+    def items(self):
+        return _FastItemsView(self)
+
+    def values(self):
+        return self._values.values()
+
+
+WORDS_CACHE_SIZE = 2**16
+
+
+# runs of word characters (underscore splits)
+_WORD_RUN = re.compile(r"[^\W_]+")
+
+
+@lru_cache(maxsize=WORDS_CACHE_SIZE)
+def _get_words(identifier):
+    # a run is split before an upper case character that follows one that
+    # is not upper case, so a word is a run of upper case characters followed by
+    # other characters, or a run of other characters
+    words = []
+    for run in _WORD_RUN.findall(identifier):
+        if run.islower():
+            words.append(run)
+            continue
+        start = 0
+        prev_upper = True
+        for i, char in enumerate(run):
+            upper = char.isupper()
+            if upper and not prev_upper:
+                words.append(run[start:i])
+                start = i
+            prev_upper = upper
+        words.append(run[start:])
+    return tuple(words)
+
+
 def get_words(identifier: str) -> list:
     """tokenize an identifier into words
 
+    Results are cached (LRU), so repeated identifiers (e.g. column
+    names) are cheap.
+
     Args:
          identifier(str): text
     Returns:
@@ -99,28 +293,165 @@ def get_words(identifier: str) -> list:
         ['hello', 'world']
         >>> get_words("helloJSON")  # multiple uppercase
         ['hello', 'JSON']
+        >>> get_words("__hello__world__")  # no empty words
+        ['hello', 'world']
+        >>> get_words("helloΩmega")  # any unicode upper case
+        ['hello', 'Ωmega']
+    """
+    return list(_get_words(identifier))
+
+
+def get_words_many(identifiers) -> list:
+    """tokenize many identifiers into words
+
+    Args:
+         identifiers: iterable of str
+    Returns:
+        list of lists of words
+    Examples:
+
+        >>> get_words_many(["userId", "user id"])
+        [['user', 'Id'], ['user', 'id']]
+    """
+    return [list(_get_words(identifier)) for identifier in identifiers]
+
+
+def to_snake_case(identifier: str) -> str:
+    """
+    Examples:
+
+        >>> to_snake_case("helloJSON world")
+        'hello_json_world'
+    """
+    return "_".join(_get_words(identifier)).lower()
+
+
+def to_kebab_case(identifier: str) -> str:
+    """
+    Examples:
+
+        >>> to_kebab_case("helloJSON world")
+        'hello-json-world'
+    """
+    return "-".join(_get_words(identifier)).lower()
+
+
+def to_camel_case(identifier: str) -> str:
+    """
+    Examples:
+
+        >>> to_camel_case("hello_JSON world")
+        'helloJsonWorld'
     """
-    # find all non upper case followed by upper case character
-    text = ""
-    for c1, c2 in zip(identifier, identifier[1:] + " "):
-        text += c1
-        if c2.isupper() and not c1.isupper():
-            text += "_"
-    # replace all the different split characters
-    # NOTE: inverse \w matches a-z, A-Z, 0-9, and _
-    text = re.sub(r"\W+", "_", text)
-    text.strip("_")
-    return text.split("_")
-
-
-def structure_to_flat_dict(obj) -> dict:
-    """Recursively fold structure into flat dict
+    words = _get_words(identifier)
+    if not words:
+        return ""
+    return words[0].lower() + "".join(w.capitalize() for w in words[1:])
+
+
+class ListIndex(int):
+    """List index in a tuple path (to tell it apart from an int dict key)"""
+
+    __slots__ = ()
+
+
+_list_indexes = []
+
+
+def _get_list_indexes(n):
+    """Return (shared) list with at least n ListIndex objects"""
+    global _list_indexes
+    indexes = _list_indexes
+    if len(indexes) < n:
+        # replace instead of append: thread safe
+        size = max(n, 2 * len(indexes))
+        indexes = indexes + [ListIndex(i) for i in range(len(indexes), size)]
+        _list_indexes = indexes
+    return indexes
+
+
+def _iter_children(obj):
+    """Yield (key, value) pairs of a dict or list with folded string keys"""
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            k = str(k)
+            assert FOLD_SEPARATOR not in k and FOLD_LIST_INDICATOR not in k
+            yield k, v
+    elif isinstance(obj, (list, tuple)):
+        for k, v in enumerate(obj):
+            yield "%s%d" % (FOLD_LIST_INDICATOR, k), v
+    else:
+        raise Exception("Not a dict or list")
+
+
+def _iter_children_tuple(obj):
+    """Return iterator of (key, value) pairs of a dict or list with
+    original keys and ListIndex for list items"""
+    if isinstance(obj, dict):
+        return iter(obj.items())
+    elif isinstance(obj, (list, tuple)):
+        return zip(_get_list_indexes(len(obj)), obj)
+    else:
+        raise Exception("Not a dict or list")
+
+
+def iter_flat_items(obj, tuple_paths=False):
+    """Iterate over the leaves of a nested structure with folded keys.
+
+    Same items (and order) as structure_to_flat_dict, but without
+    building intermediate dicts and without recursion. The key prefix
+    of each container is built only once.
+
+    Args:
+        obj: nested data structure
+        tuple_paths (bool): if True, keys are tuples of the original
+            keys (any type) and ListIndex (int) for list items,
+            instead of strings. No string formatting or checking
+            of keys is necessary.
+    Yields:
+        tuples (folded key, value)
+    Examples:
+        >>> list(iter_flat_items({1: [2, {3: 4}, [5, 6]]}))
+        [('1.#0', 2), ('1.#1.3', 4), ('1.#2.#0', 5), ('1.#2.#1', 6)]
+
+        >>> list(iter_flat_items({"1": [2, {"3.x": 4}]}, tuple_paths=True))
+        [(('1', 0), 2), (('1', 1, '3.x'), 4)]
+
+    """
+    if tuple_paths:
+        iter_children = _iter_children_tuple
+        stack = [((), iter_children(obj))]
+    else:
+        iter_children = _iter_children
+        stack = [("", iter_children(obj))]
+    while stack:
+        prefix, children = stack[-1]
+        for k, v in children:
+            if isinstance(v, (dict, list, tuple)):
+                # continue with the child, come back later
+                if tuple_paths:
+                    child_prefix = prefix + (k,)
+                else:
+                    child_prefix = prefix + k + FOLD_SEPARATOR
+                stack.append((child_prefix, iter_children(v)))
+                break
+            if tuple_paths:
+                yield prefix + (k,), v
+            else:
+                yield prefix + k, v
+        else:
+            stack.pop()
+
+
+def structure_to_flat_dict(obj, tuple_paths=False) -> dict:
+    """Fold structure into flat dict
 
     Reverse (sort of) of flat_dict_to_structure, but keys will
-    be always strings.
+    be always strings (unless tuple_paths is used).
 
     Args:
         obj: nested data structure
+        tuple_paths (bool): use tuple keys, see iter_flat_items
     Returns:
          flat dictionary
     Examples:
@@ -134,37 +465,51 @@ def structure_to_flat_dict(obj) -> dict:
         [('1.#0', 2), ('1.#1.3', 4), ('1.#2.#0', 5), ('1.#2.#1', 6)]
 
     """
-    res = {}
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            k = str(k)
-            assert FOLD_SEPARATOR not in k and FOLD_LIST_INDICATOR not in k
-            if isinstance(v, (dict, list, tuple)):
-                for k2, v2 in structure_to_flat_dict(v).items():
-                    res["%s%s%s" % (k, FOLD_SEPARATOR, k2)] = v2
-            else:
-                res[k] = v
-    elif isinstance(obj, (list, tuple)):
-        for k, v in enumerate(obj):
-            k = "%s%d" % (FOLD_LIST_INDICATOR, k)
-            if isinstance(v, (dict, list, tuple)):
-                for k2, v2 in structure_to_flat_dict(v).items():
-                    res["%s%s%s" % (k, FOLD_SEPARATOR, k2)] = v2
-            else:
-                res[k] = v
-    else:
-        raise Exception("Not a dict or list")
-    return res
+    return dict(iter_flat_items(obj, tuple_paths=tuple_paths))
 
 
-def flat_dict_to_structure(flat_dict) -> object:
-    """Recursively unfold flat dict into nested structure.
+class _FoldNode:
+    """Container in the tree built by flat_dict_to_structure"""
+
+    __slots__ = ("is_list", "children", "value")
+
+    def __init__(self):
+        self.is_list = None  # decided by the first key
+        self.children = {}
+
+    def build(self):
+        """Set value from children (which must have been built already)"""
+        children = self.children
+        if self.is_list:
+            n_items = max(children) + 1 if children else 0
+            if len(children) != n_items:
+                missing = min(set(range(n_items)) - set(children))
+                raise KeyError("%s%d" % (FOLD_LIST_INDICATOR, missing))
+            value = [None] * n_items
+        else:
+            value = {}
+        for k, v in children.items():
+            if isinstance(v, _FoldNode):
+                v = v.value
+            value[k] = v
+        self.value = value
+        self.children = None
+
+
+def flat_dict_to_structure(flat_dict, tuple_paths=False) -> object:
+    """Unfold flat dict into nested structure.
 
     Reverse (sort of) of structure_to_flat_dict, but keys will
-    be always strings.
+    be always strings (unless tuple_paths is used).
+
+    Every key is split only once and inserted into a tree, lists are
+    created with their final size.
 
     Args:
-        obj: flat dictionary
+        flat_dict: flat dictionary or iterable of (key, value) pairs,
+            e.g. iter_flat_items or rows from a file
+        tuple_paths (bool): keys are tuples (see iter_flat_items),
+            only ListIndex elements are list indexes.
     Returns:
          nested data structure
     Examples:
@@ -174,47 +519,172 @@ def flat_dict_to_structure(flat_dict) -> object:
         >>> flat_dict_to_structure({'#0.#0': 1, '#0.#1': 2, '#0.#2.#0': 3})
         [[1, 2, [3]]]
 
+        >>> flat_dict_to_structure(iter([('a.#1', 2), ('a.#0', 1)]))
+        {'a': [1, 2]}
+
+        >>> obj = {1: [2, {(3, 4): 5}]}
+        >>> flat = structure_to_flat_dict(obj, tuple_paths=True)
+        >>> flat_dict_to_structure(flat, tuple_paths=True) == obj
+        True
+
     """
-    is_list = None
-    # split first part of key and group
-    groups = {}
-    for k, v in flat_dict.items():
-        ks = k.split(FOLD_SEPARATOR)
-        k1 = ks[0]  # first part
-        k2 = FOLD_SEPARATOR.join(ks[1:])  # all the other parts joined
-        is_list_item = k1.startswith(FOLD_LIST_INDICATOR)
-        if is_list is None:
-            is_list = is_list_item
-        elif is_list != is_list_item:
-            raise Exception("Keys must be all numerical or none of them")
-        if k2:
-            if k1 not in groups:
-                groups[k1] = {}
-            groups[k1][k2] = v
-        else:  # recursion end
-            groups[k1] = v
-    if is_list:
-        res = []
-        for k in range(len(groups)):
-            k = "%s%d" % (FOLD_LIST_INDICATOR, k)
-            v = groups[k]
-            if isinstance(v, dict):
-                v = flat_dict_to_structure(v)
-            res.append(v)
-    else:
-        res = {}
-        for k, v in groups.items():
-            if isinstance(v, dict):
-                v = flat_dict_to_structure(v)
-            res[k] = v
-    return res
+    if isinstance(flat_dict, Mapping):
+        flat_dict = flat_dict.items()
+    return _unfold((k, _parse_fold_key(k, tuple_paths), v)
+                   for k, v in flat_dict)
+
+
+def _parse_fold_key(key, tuple_paths=False):
+    """Split folded key into a tuple of (part, is list index)"""
+    if tuple_paths:
+        return tuple((part, type(part) is ListIndex) for part in key)
+    parts = []
+    for part in key.split(FOLD_SEPARATOR):
+        if part.startswith(FOLD_LIST_INDICATOR):
+            parts.append((int(part[len(FOLD_LIST_INDICATOR):]), True))
+        else:
+            parts.append((part, False))
+    return tuple(parts)
+
+
+def _unfold(items):
+    """Build nested structure from tuples (key, parsed key, value)"""
+    root = _FoldNode()
+    nodes = [root]
+    for k, parts, v in items:
+        node = root
+        last = len(parts) - 1
+        for i, (part, is_list_item) in enumerate(parts):
+            if node.is_list is None:
+                node.is_list = is_list_item
+            elif node.is_list != is_list_item:
+                raise Exception("Keys must be all numerical or none of them")
+            children = node.children
+            if i == last:
+                if part in children:
+                    raise Exception("Duplicate key: %s" % (k,))
+                children[part] = v
+            elif part not in children:
+                node = children[part] = _FoldNode()
+                nodes.append(node)
+            else:
+                node = children[part]
+                if not isinstance(node, _FoldNode):
+                    raise Exception("Duplicate key: %s" % (k,))
+    # children are always created after their parents:
+    # build in reverse order
+    for node in reversed(nodes):
+        node.build()
+    return root.value
+
+
+def records_to_columns(records, tuple_paths=False):
+    """Fold many records into one table with a shared schema.
+
+    Every folded key becomes a column (created once, with an interned
+    name), the values are stored per column, typed arrays for int and
+    float columns. Missing values are tracked per column.
+
+    Args:
+        records: iterable of nested data structures
+        tuple_paths (bool): use tuple keys, see iter_flat_items
+    Returns:
+        filetools.columns.ColumnTable, one row per record
+    Examples:
+        >>> table = records_to_columns([{"a": {"b": 1}}, {"a": {"c": [2]}}])
+        >>> list(table.names)
+        ['a.b', 'a.c.#0']
+        >>> table.column("a.c.#0")  # missing values are None
+        [None, 2]
+        >>> list(columns_to_records(table))
+        [{'a': {'b': 1}}, {'a': {'c': [2]}}]
+
+    """
+    table = ColumnTable()
+    for record in records:
+        table.append(iter_flat_items(record, tuple_paths=tuple_paths))
+    return table
+
+
+def columns_to_records(table, tuple_paths=False):
+    """Unfold the rows of a table into nested records.
+
+    Reverse of records_to_columns. Column names are parsed only once,
+    not for every row.
+
+    Args:
+        table (ColumnTable): table with folded column names
+        tuple_paths (bool): column names are tuples, see iter_flat_items
+    Yields:
+        nested data structures, one per row
+    """
+    columns = []
+    for key, column in table.columns.items():
+        column.pad(len(table))
+        name = table.names[key]
+        columns.append((name, _parse_fold_key(name, tuple_paths), column))
+    for index in range(len(table)):
+        yield _unfold(
+            (name, parts, column[index])
+            for name, parts, column in columns
+            if column.mask[index]
+        )
+
+
+def compile_glob(pattern):
+    """Compile a shell style pattern for Filter
+
+    Examples:
+        >>> compile_glob("col_*").fullmatch("col_1") is not None
+        True
+    """
+    return re.compile(fnmatch.translate(pattern))
+
+
+def _scoped(pattern):
+    """Return pattern string, flags made local to the pattern"""
+    flags = "".join(c for flag, c in ((re.IGNORECASE, "i"), (re.DOTALL, "s"),
+                                      (re.MULTILINE, "m"), (re.VERBOSE, "x"))
+                    if pattern.flags & flag)
+    if flags:
+        return "(?%s:%s)" % (flags, pattern.pattern)
+    return pattern.pattern
+
+
+# numbered group references break when the group numbers shift
+_NUMBERED_REF = re.compile(r"\\[1-9]|\(\?\(\d")
+
+
+def _combine(parts):
+    """Compile parts into one alternation, None if they don't combine"""
+    try:
+        with warnings.catch_warnings():
+            # before python 3.11 inline global flags are only deprecated
+            # in the middle of a pattern, but apply to all of it
+            warnings.simplefilter("error", DeprecationWarning)
+            return re.compile("|".join(parts))
+    except (re.error, DeprecationWarning):
+        return None
+
+
+# kinds of items in a Filter
+_IGNORED, _ALLOWED, _UNKNOWN = 0, 1, 2
+_PATTERN_TYPE = type(re.compile(""))
 
 
 class Filter:
+    #: maximum number of items matched by patterns that are memoized
+    cache_size = 2**16
+
     def __init__(self, required=None, optional=None, ignored=None,
                  allow_unknown=False):
         """
 
+        Items can be literals or compiled regular expressions (see also
+        compile_glob), which must match the whole item. Literals take
+        precedence over patterns, ignored patterns over the others.
+        A required pattern must match at least one item.
+
         Examples:
             >>> f = Filter(ignored=['a'], allow_unknown=True)
             >>> f(['b', 'a'])
@@ -236,72 +706,355 @@ class Filter:
             ...
             KeyError: 'Item not allowed: c'
 
+            >>> f = Filter(required=[compile_glob('id_*')],
+            ...            ignored=[re.compile(r'_.*')])
+            >>> f(['id_1', '_tmp', 'id_2'])
+            ['id_1', 'id_2']
+
         """
-        self.required = set(required or [])
-        self.optional = set(optional or [])
-        self.ignored = set(ignored or [])
+        required, required_patterns = self._split(required)
+        optional, optional_patterns = self._split(optional)
+        ignored, ignored_patterns = self._split(ignored)
+        self.required = set(required)
+        self.optional = set(optional)
+        self.ignored = set(ignored)
         self.allow_unknown = allow_unknown
         self.known = self.required | self.optional | self.ignored
+        # every required literal / pattern is one bit
+        self._lookup = {}  # item -> (kind, bit)
+        n_bits = 0
+        for it in self.optional:
+            self._lookup[it] = (_ALLOWED, 0)
+        for it in self.required:
+            self._lookup[it] = (_ALLOWED, 1 << n_bits)
+            n_bits += 1
+        for it in self.ignored:
+            self._lookup[it] = (_IGNORED, 0)
+        # one combined pattern, groups in order of priority
+        groups = {}
+        parts = []
+        sequential = []  # (pattern, kind, bit)
+        for kind, patterns in ((_IGNORED, ignored_patterns),
+                               (_ALLOWED, required_patterns),
+                               (_ALLOWED, optional_patterns)):
+            for pattern in patterns:
+                name = "_f%d" % len(parts)
+                bit = 0
+                if patterns is required_patterns:
+                    bit = 1 << n_bits
+                    n_bits += 1
+                groups[name] = (kind, bit)
+                parts.append("(?P<%s>%s)" % (name, _scoped(pattern)))
+                sequential.append((pattern, kind, bit))
+        self._pattern = None
+        self._sequential = None
+        if parts:
+            if any(pattern.groups and _NUMBERED_REF.search(pattern.pattern)
+                   for pattern, _, _ in sequential):
+                self._sequential = sequential
+            else:
+                self._pattern = _combine(parts)
+                if self._pattern is None:
+                    # e.g. inline global flags, same group name twice
+                    self._sequential = sequential
+        self._groups = groups
+        self._all_bits = (1 << n_bits) - 1
+        self._n_cached = 0
 
-    def __call__(self, items):
-        res = []
-        required_found = set()
+    @staticmethod
+    def _split(items):
+        """Return literals and compiled patterns"""
+        literals, patterns = [], []
+        for it in items or []:
+            (patterns if isinstance(it, _PATTERN_TYPE) else literals).append(
+                it)
+        return literals, patterns
+
+    def _match(self, it):
+        """Return (kind, bit) of an item"""
+        try:
+            return self._lookup[it]
+        except KeyError:
+            pass
+        res = (_UNKNOWN, 0)
+        if not isinstance(it, str):
+            return res
+        if self._pattern is not None:
+            match = self._pattern.fullmatch(it)
+            if match:
+                res = self._groups[match.lastgroup]
+        elif self._sequential is not None:
+            for pattern, kind, bit in self._sequential:
+                if pattern.fullmatch(it):
+                    res = (kind, bit)
+                    break
+        else:
+            return res
+        if self._n_cached < self.cache_size:
+            self._lookup[it] = res
+            self._n_cached += 1
+        return res
+
+    def iter(self, items):
+        """Yield allowed items as they are consumed.
+
+        Raises KeyError as soon as a not allowed item is found,
+        and at the end if required items are missing.
+
+        Examples:
+            >>> f = Filter(optional=['a'])
+            >>> it = f.iter(['a', 'b', 'c'])
+            >>> next(it)
+            'a'
+            >>> next(it)
+            Traceback (most recent call last):
+            ...
+            KeyError: 'Item not allowed: b'
+        """
+        found = 0
+        match = self._match
+        allow_unknown = self.allow_unknown
         for it in items:
-            if it in self.ignored:
+            kind, bit = match(it)
+            if kind == _IGNORED:
                 continue
-            elif not self.allow_unknown and it not in self.known:
+            elif kind == _UNKNOWN and not allow_unknown:
                 raise KeyError('Item not allowed: %s' % it)
-            if it in self.required:
-                required_found.add(it)
-            res.append(it)
-        if required_found != self.required:
-            n_missing = len(self.required - required_found)
+            found |= bit
+            yield it
+        missing = self._all_bits & ~found
+        if missing:
+            n_missing = bin(missing).count("1")
             raise KeyError('Missing %d required items' % n_missing)
-        return res
 
+    def __call__(self, items):
+        return list(self.iter(items))
 
-def structure_to_relational_tables(structure):
+
+def structure_to_relational_tables(structure, **kwargs):
     """Convert a nested structure into relational tables.
 
+    A list is handled as a list of records, see
+    relational.RelationalNormalizer for the rules (and a streaming
+    version for large inputs).
+
     Args:
         structure: a nested python data structure
+        kwargs: passed on to relational.RelationalNormalizer
 
     Returns:
         list: table data
             * items are {name, schema, data}
             * values of data are lists of tuples
+
+    Examples:
+        >>> for table in structure_to_relational_tables(
+        ...         [{"a": 1, "b": {"c": 2}}, {"a": 3, "d": [4, 5]}]):
+        ...     print(table["name"], table["schema"], table["data"])
+        root ['_id', 'a'] [(1, 1), (2, 3)]
+        root.b ['_id', 'root_id', 'c'] [(1, 1, 2)]
+        root.d ['_id', 'root_id', 'value'] [(1, 2, 4), (2, 2, 5)]
+    """
+    sink = MemorySink()
+    with RelationalNormalizer(sink, **kwargs) as normalizer:
+        if isinstance(structure, (list, tuple)):
+            normalizer.add_many(structure)
+        else:
+            normalizer.add(structure)
+    return list(sink.tables.values())
+
+
+def _get_value_token(value):
+    return "%s:%r" % (type(value).__name__, value)
+
+
+def _get_digest(text):
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def get_structure_digest(obj, digests=None):
+    """Structural hash of a nested data structure.
+
+    Equal structures have equal digests, the order of dict keys does
+    not matter. Containers are hashed bottom-up (without recursion),
+    every container is hashed once as one text of its items.
+
+    Args:
+        obj: nested data structure
+        digests (dict, optional): memo id(container) -> digest, reused
+            for nested containers (objects must not change meanwhile)
+    Returns:
+        bytes
+    Examples:
+        >>> get_structure_digest({"a": [1, {"b": 2}], "c": None}) == \\
+        ...     get_structure_digest({"c": None, "a": [1, {"b": 2}]})
+        True
+        >>> get_structure_digest([1]) == get_structure_digest([True])
+        False
     """
-    pass
+    if not isinstance(obj, (dict, list, tuple)):
+        return _get_digest(_get_value_token(obj))
+    if digests is None:
+        digests = {}
+    stack = [(obj, False)]
+    while stack:
+        container, children_done = stack.pop()
+        if id(container) in digests:
+            continue
+        if isinstance(container, dict):
+            values = container.values()
+        else:
+            values = container
+        if not children_done:
+            stack.append((container, True))
+            stack.extend((v, False) for v in values
+                         if isinstance(v, (dict, list, tuple))
+                         and id(v) not in digests)
+            continue
+        # tokens of values start with the type name and cannot contain
+        # control characters (repr), nested containers start with "#"
+        tokens = [
+            "#" + digests[id(v)].hex() if isinstance(v, (dict, list, tuple))
+            else _get_value_token(v)
+            for v in values
+        ]
+        if isinstance(container, dict):
+            text = "d" + "\x00".join(sorted(
+                "%s\x01%s" % (_get_value_token(k), token)
+                for k, token in zip(container, tokens)))
+        else:
+            text = "l" + "\x00".join(tokens)
+        digests[id(container)] = _get_digest(text)
+    return digests[id(obj)]
+
+
+class PatternRouter:
+    #: maximum number of memoized paths
+    cache_size = 2**16
+
+    def __init__(self):
+        """Map paths to targets by regular expressions.
+
+        All patterns are compiled into one alternation with named groups,
+        patterns without special characters are looked up in a dict,
+        and results are memoized per path, so the cost of a lookup does
+        not grow with the number of patterns. The first added pattern
+        that matches the whole path wins.
+
+        Examples:
+            >>> router = PatternRouter()
+            >>> router.add("/a/[^/]+", 1)
+            >>> router.add("/a/b", 2)
+            >>> router.add("/c", 3)
+            >>> router.get("/a/b"), router.get("/c"), router.get("/d")
+            (1, 3, None)
+        """
+        self._routes = []  # (pattern, target)
+        self._compiled = False
+
+    def add(self, pattern, target):
+        """Add a route.
+
+        Args:
+            pattern (str): regular expression for the whole path
+            target: returned by get for matching paths
+        """
+        self._routes.append((pattern, target))
+        self._compiled = False
+
+    def __len__(self):
+        return len(self._routes)
+
+    def _compile(self):
+        self._literals = {}  # path -> index of first route
+        parts = []
+        for index, (pattern, target) in enumerate(self._routes):
+            if re.escape(pattern) == pattern:
+                self._literals.setdefault(pattern, index)
+            else:
+                parts.append("(?P<_r%d>%s)" % (index, pattern))
+        self._patterns = None
+        self._sequential = None
+        if parts:
+            try:
+                self._patterns = re.compile("|".join(parts))
+            except re.error:  # e.g. same group name in two patterns
+                self._sequential = [
+                    (re.compile(pattern), index)
+                    for index, (pattern, target) in enumerate(self._routes)
+                    if re.escape(pattern) != pattern
+                ]
+        self._cache = {}
+        self._compiled = True
+
+    def _find(self, path):
+        """Return index of the first matching route (or None)"""
+        index = self._literals.get(path)
+        if self._patterns is not None:
+            match = self._patterns.fullmatch(path)
+            if match:
+                pattern_index = int(match.lastgroup[2:])
+                if index is None or pattern_index < index:
+                    index = pattern_index
+        elif self._sequential is not None:
+            for pattern, pattern_index in self._sequential:
+                if index is not None and pattern_index > index:
+                    break
+                if pattern.fullmatch(path):
+                    index = pattern_index
+                    break
+        return index
+
+    def get(self, path, default=None):
+        """Return target of the first route matching path"""
+        if not self._compiled:
+            self._compile()
+        try:
+            index = self._cache[path]
+        except KeyError:
+            index = self._find(path)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[path] = index
+        if index is None:
+            return default
+        return self._routes[index][1]
 
 
 class NestedTables:
     def __init__(self):
-        self.pat2table = []
+        self.pat2table = PatternRouter()
         self.logger = logging.getLogger("NestedTables")
         self.logger.setLevel(logging.DEBUG)
         for h in self.logger.handlers:
             h.setLevel(logging.DEBUG)
 
     def add_table(self, name, path_patterns, id_column=None, ref_id_column=None,
-                  auto_id=False):
+                  auto_id=False, deduplicate=False):
+        """
+        Args:
+            deduplicate (bool): insert equal rows (including nested data)
+                only once and return the existing row id. Only applies to
+                rows from dicts (their id is stored in the parent row),
+                these rows have no foreign key to the parent row (which is
+                not unique anymore).
+        """
         tab = {
             "name": name,
             "table_data": {},
             "id_column": id_column or 'id',
             "ref_id_column": ref_id_column or '%s_id' % name,
-            "auto_id": 0 if auto_id else None
+            "auto_id": 0 if auto_id else None,
+            "digests": {} if deduplicate else None
         }
         for pat in path_patterns:
-            self.pat2table.append((re.compile("^%s$" % pat), tab))
+            self.pat2table.add(pat, tab)
 
     def get_table(self, table_path):
         """
         return get_row_id function
         """
-        for pat, tab in self.pat2table:
-            if pat.match(table_path):
-                return tab
-        return None
+        return self.pat2table.get(table_path)
 
     def parse_value(self, value, table_path='', col_name='', row_id=None):
         self.logger.debug(('parse_value',value, table_path, col_name, row_id))
@@ -319,7 +1072,8 @@ class NestedTables:
                 ref_row_id = self.insert_row(row=value,
                                              table_path=ref_table_path,
                                              ref_table_path=table_path,
-                                             ref_row_id=row_id)
+                                             ref_row_id=row_id,
+                                             linked_down=True)
                 return ref_row_id
             else:  # not yet in table context
                 for k, v in value.items():
@@ -343,7 +1097,8 @@ class NestedTables:
         else:  # primitive  value
             return value
 
-    def insert_row(self, row, table_path, ref_table_path='', ref_row_id=None):
+    def insert_row(self, row, table_path, ref_table_path='', ref_row_id=None,
+                   linked_down=False):
         """
         Args:
             row(dict): row data
@@ -353,6 +1108,8 @@ class NestedTables:
                 structure to identify the parent table
             ref_row_id (optional): identifier of the parent row in the nested
                 structure.
+            linked_down (bool): the returned row id is stored in the parent
+                row, so the row can be deduplicated (see add_table)
 
         Side effect:
             parsed row will be appended to table_data
@@ -364,6 +1121,11 @@ class NestedTables:
         table = self.get_table(table_path)
         if table is None:
             raise Exception("No table for path: %s" % table_path)
+        digests = table["digests"] if linked_down else None
+        if digests is not None:
+            digest = get_structure_digest(row)
+            if digest in digests:
+                return digests[digest]
 
         # get id, either by column or by auto incrementing max_id
         id_column = table["id_column"]
@@ -379,7 +1141,9 @@ class NestedTables:
                                          row_id=row_id, table_path=table_path)
             if col_value is not None:
                 res[col_name] = col_value
-        if ref_table_path and ref_row_id:
+        if digests is not None:
+            digests[digest] = row_id
+        elif ref_table_path and ref_row_id:
             # add foreign key ro ref table
             ref_table = self.get_table(ref_table_path)
             ref_id_column = ref_table["ref_id_column"]
@@ -393,7 +1157,7 @@ class NestedTables:
 
 class NestedTables2:
     def __init__(self):
-        self.pat2table = []
+        self.pat2table = PatternRouter()
         self.logger = logging.getLogger("NestedTables2")
         self.logger.setLevel(logging.DEBUG)
         for h in self.logger.handlers:
@@ -412,16 +1176,13 @@ class NestedTables2:
             "auto_id": 0 if auto_id else None
         }
         for pat in path_patterns:
-            self.pat2table.append((re.compile("^%s$" % pat), tab))
+            self.pat2table.add(pat, tab)
 
     def get_table(self, table_path):
         """
         return get_row_id function
         """
-        for pat, tab in self.pat2table:
-            if pat.match(table_path):
-                return tab
-        return None
+        return self.pat2table.get(table_path)
 
     def parse(self, value, parent_path='', key='', is_attr=False, parent_id=None):
         if not value:  # ignore None, [], {}
@@ -34,6 +34,6 @@ if __name__ == "__main__":
             "License :: OSI Approved :: " + __license__,
             "Operating System :: OS Independent",
         ],
-        python_requires=">=3.6",
+        python_requires=">=3.7",
         package_data={"": ["data/**"]},
     )
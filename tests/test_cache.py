@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+from filetools.classes import FileTool, FileInspector
+
+
+class CountingInspector(FileInspector):
+    file_types = [""]
+    n_calls = 0
+
+    @classmethod
+    def inspect_file(cls, path):
+        cls.n_calls += 1
+        return {"n_calls": cls.n_calls}
+
+
+class StructuredInspector(FileInspector):
+    file_types = [""]
+
+    @classmethod
+    def inspect_file(cls, path):
+        return {"counts": {1: (2, 3)}}
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmpdir.name, "cache.db")
+        self.file_path = os.path.join(self.tmpdir.name, "data")
+        with open(self.file_path, "wb") as file:
+            file.write(b"data")
+        CountingInspector.n_calls = 0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def create_ft(self, **kwargs):
+        ft = FileTool(cache_path=self.cache_path, **kwargs)
+        ft.register_file_class(CountingInspector)
+        self.addCleanup(ft.cache.close)
+        return ft
+
+    def test_hit_after_reopen(self):
+        ft = self.create_ft()
+        self.assertEqual(ft.inspect_file(self.file_path)["n_calls"], 1)
+        self.assertEqual(ft.inspect_file(self.file_path)["n_calls"], 1)
+        ft.cache.flush()
+        ft2 = self.create_ft()
+        meta = ft2.inspect_file(self.file_path)
+        self.assertEqual(meta["n_calls"], 1)
+        self.assertEqual(meta["size_bytes"], 4)
+        self.assertEqual(CountingInspector.n_calls, 1)
+
+    def test_hit_equals_miss(self):
+        ft = self.create_ft()
+        ft.register_file_class(StructuredInspector)
+        miss = ft.inspect_file(self.file_path)
+        self.assertEqual(ft.inspect_file(self.file_path), miss)
+        ft.cache.flush()
+        ft2 = self.create_ft()
+        ft2.register_file_class(StructuredInspector)
+        hit = ft2.inspect_file(self.file_path)
+        self.assertEqual(hit, miss)
+        self.assertEqual(hit["counts"], {1: (2, 3)})
+        self.assertEqual(CountingInspector.n_calls, 1)
+
+    def test_modified_file(self):
+        ft = self.create_ft()
+        ft.inspect_file(self.file_path)
+        with open(self.file_path, "ab") as file:
+            file.write(b"more")
+        meta = ft.inspect_file(self.file_path)
+        self.assertEqual(meta["n_calls"], 2)
+        self.assertEqual(meta["size_bytes"], 8)
+
+    def test_invalidate(self):
+        ft = self.create_ft()
+        ft.inspect_file(self.file_path)
+        ft.invalidate_cache(self.file_path, CountingInspector)
+        self.assertEqual(ft.inspect_file(self.file_path)["n_calls"], 2)
+        ft.invalidate_cache()
+        self.assertEqual(len(ft.cache), 0)
+
+    def test_version(self):
+        ft = self.create_ft()
+        ft.inspect_file(self.file_path)
+        CountingInspector.version = 1
+        self.addCleanup(setattr, CountingInspector, "version", 0)
+        self.assertEqual(ft.inspect_file(self.file_path)["n_calls"], 2)
+
+    def test_eviction(self):
+        ft = self.create_ft(cache_max_entries=2)
+        ft.inspect_file(self.file_path)
+        ft.cache.flush()
+        # two inspectors (FileBinary, CountingInspector) per file
+        self.assertEqual(len(ft.cache), 2)
+        path2 = self.file_path + "2"
+        with open(path2, "wb") as file:
+            file.write(b"")
+        ft.inspect_file(path2)
+        ft.cache.flush()
+        self.assertEqual(len(ft.cache), 2)
+        self.assertEqual(ft.inspect_file(path2)["n_calls"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
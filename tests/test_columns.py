@@ -0,0 +1,113 @@
+import io
+import unittest
+from filetools.columns import Column, ColumnTable
+
+
+class TestColumn(unittest.TestCase):
+    def test_typed(self):
+        col = Column()
+        col.append_missing()
+        col.append(1)
+        col.append(2)
+        self.assertEqual(col.typecode, "q")
+        self.assertEqual(list(col.export()), [0, 1, 2])
+        self.assertEqual([col[i] for i in range(3)], [None, 1, 2])
+        self.assertEqual(col.to_list(), [None, 1, 2])
+
+    def test_promote(self):
+        col = Column()
+        col.append(1.5)
+        col.append_missing()
+        col.append("x")
+        self.assertEqual(col.typecode, None)
+        self.assertEqual(col.export(), [1.5, None, "x"])
+        col = Column()
+        col.append(1)
+        col.append(2 ** 64)
+        self.assertEqual(col.export(), [1, 2 ** 64])
+
+    def test_append_column(self):
+        col = Column()
+        col.append(1)
+        other = Column()
+        other.append_missing()
+        other.append(2)
+        col.append_column(other)
+        self.assertEqual(col.typecode, "q")
+        self.assertEqual(col.to_list(), [1, None, 2])
+        other = Column()
+        other.append("x")
+        col.append_column(other)
+        col.append_column(Column())
+        self.assertEqual(col.to_list(), [1, None, 2, "x"])
+        col = Column()
+        col.append_missing()
+        col.append_column(other)
+        self.assertEqual(col.to_list(), [None, "x"])
+
+
+class TestColumnTable(unittest.TestCase):
+    def setUp(self):
+        self.table = ColumnTable(get_key=str.lower)
+        self.table.append({"path": "a", "Size": 1})
+        self.table.append([("path", "b"), ("size", 2), ("extra", True)])
+        self.table.append({"path": "c"})
+
+    def test_rows(self):
+        self.assertEqual(len(self.table), 3)
+        self.assertEqual(dict(self.table[0]), {"path": "a", "Size": 1})
+        self.assertEqual(self.table[1]["SIZE"], 2)
+        self.assertEqual(dict(self.table[-1]), {"path": "c"})
+        self.assertRaises(KeyError, lambda: self.table[0]["extra"])
+
+    def test_column(self):
+        # missing values are None, also in typed columns
+        self.assertEqual(self.table.column("size"), [1, 2, None])
+        self.assertEqual(self.table.column("extra"), [None, True, None])
+        self.set_size(0)
+        self.assertEqual(self.table.column("size").tolist(), [1, 2, 0])
+
+    def set_size(self, value):
+        # fill the missing value of the last row
+        column = self.table.get_column("size")
+        column.pad(len(self.table))
+        column[2] = value
+
+    def test_export_copy(self):
+        self.set_size(3)
+        size = self.table.column("size")
+        self.table.column("size")
+        # the table can still grow while exported values are in use
+        self.table.append({"size": 4})
+        self.assertEqual(list(size), [1, 2, 3])
+        self.assertEqual(list(self.table.column("size")), [1, 2, 3, 4])
+
+    def test_freeze(self):
+        self.set_size(3)
+        self.table.freeze()
+        size = self.table.column("size")
+        self.assertIsInstance(size, memoryview)
+        self.assertEqual(list(size), [1, 2, 3])
+        self.assertEqual(self.table.column("extra"), [None, True, None])
+        self.assertRaises(Exception, self.table.append, {"size": 4})
+        self.assertRaises(Exception, self.table.get_column, "new", True)
+        self.assertEqual(len(self.table), 3)
+
+    def test_append_table(self):
+        other = ColumnTable()
+        other.append({"SIZE": 4, "new": "x"})
+        self.assertEqual(self.table.append_table(other), 3)
+        self.assertEqual(len(self.table), 4)
+        self.assertEqual(self.table.column("size"), [1, 2, None, 4])
+        self.assertEqual(self.table.column("new"), [None] * 3 + ["x"])
+        self.assertEqual(self.table.column("path"), ["a", "b", "c", None])
+
+    def test_csv(self):
+        buf = io.StringIO()
+        self.table.to_csv(buf, lineterminator="\n")
+        self.assertEqual(buf.getvalue(),
+                         "path,Size,extra\na,1,\nb,2,True\nc,,\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
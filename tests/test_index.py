@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from filetools.classes import FileTool
+from filetools.index import FileIndex
+
+
+class TestRescan(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmpdir.name, "root")
+        os.makedirs(os.path.join(self.root, "sub"))
+        self.index = FileIndex(os.path.join(self.tmpdir.name, "index.db"))
+        self.ft = FileTool()
+
+    def tearDown(self):
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.root, name)
+        with open(path, "wb") as file:
+            file.write(data)
+        return path
+
+    def rescan(self):
+        return sorted((status, path) for status, path, _
+                      in self.ft.rescan(self.root, self.index, workers=2))
+
+    def test_rescan(self):
+        path_a = self.write("a", b"a")
+        path_b = self.write(os.path.join("sub", "b"), b"b")
+        self.assertEqual(self.rescan(), [("added", path_a),
+                                         ("added", path_b)])
+        self.assertEqual(self.index.get(path_b), {"size_bytes": 1})
+        # nothing changed
+        self.assertEqual(self.rescan(), [])
+        self.write("a", b"aa")
+        os.remove(path_b)
+        self.assertEqual(self.rescan(), [("deleted", path_b),
+                                         ("modified", path_a)])
+        self.assertEqual(self.index.get(path_a), {"size_bytes": 2})
+        self.assertEqual(len(self.index), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
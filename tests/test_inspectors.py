@@ -0,0 +1,66 @@
+import os
+import hashlib
+import tempfile
+import unittest
+from filetools.classes import FileTool, FileBinary
+from filetools.inspectors import (
+    Md5Inspector,
+    Sha256Inspector,
+    Blake2bInspector,
+    LineCountInspector,
+    ByteHistogramInspector,
+)
+
+INSPECTORS = [Md5Inspector, Sha256Inspector, Blake2bInspector,
+              LineCountInspector, ByteHistogramInspector]
+
+
+class TestStreamInspectors(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "data")
+        self.data = b"line 1\nline 2\n\x00\xff" * 100
+        with open(self.path, "wb") as file:
+            file.write(self.data)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def check_meta(self, meta):
+        self.assertEqual(meta["md5"], hashlib.md5(self.data).hexdigest())
+        self.assertEqual(meta["sha256"],
+                         hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(meta["blake2b"],
+                         hashlib.blake2b(self.data).hexdigest())
+        self.assertEqual(meta["line_count"], 201)
+        histogram = meta["byte_histogram"]
+        self.assertEqual(len(histogram), 256)
+        self.assertEqual(histogram[ord("\n")], 200)
+        self.assertEqual(histogram[255], 100)
+        self.assertEqual(sum(histogram), len(self.data))
+
+    def test_inspect_stream(self):
+        metas = FileBinary.inspect_stream(self.path, INSPECTORS, chunk_size=7)
+        meta = {}
+        for m in metas:
+            meta.update(m)
+        self.check_meta(meta)
+
+    def test_file_tool(self):
+        for shared_buffer in (False, True):
+            ft = FileTool(shared_buffer=shared_buffer, chunk_size=13)
+            for insp in INSPECTORS:
+                ft.register_file_class(insp)
+            meta = ft.inspect_file(self.path)
+            self.check_meta(meta)
+            self.assertEqual(meta["size_bytes"], len(self.data))
+
+    def test_empty(self):
+        empty = os.path.join(self.tmpdir.name, "empty")
+        open(empty, "wb").close()
+        self.assertEqual(LineCountInspector.inspect_file(empty),
+                         {"line_count": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
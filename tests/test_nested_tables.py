@@ -1,5 +1,7 @@
 import unittest
 from filetools.tools import NestedTables2 as NestedTables
+from filetools.tools import PatternRouter
+from filetools.tools import NestedTables as NestedTables1
 
 
 class TestNestedTables(unittest.TestCase):
@@ -26,3 +28,64 @@ class TestNestedTables(unittest.TestCase):
         data = {'t1': [{'id': 'test_id'}]}
         res = nt.parse(data)
         #self.assertEqual(nt.get_table('/t1')["table_data"]['test_id']['id'], 'test_id')
+
+
+class TestPatternRouter(unittest.TestCase):
+    def test_priority(self):
+        router = PatternRouter()
+        router.add("/t1", "literal")
+        router.add("/t[0-9]+", "pattern")
+        router.add("/t2", "shadowed")
+        router.add("/x/.*", "any")
+        for _ in range(2):  # second time memoized
+            self.assertEqual(router.get("/t1"), "literal")
+            self.assertEqual(router.get("/t2"), "pattern")
+            self.assertEqual(router.get("/x/y/z"), "any")
+            self.assertIsNone(router.get("/t1/a"))
+        router.add("/t1/a", "added")
+        self.assertEqual(router.get("/t1/a"), "added")
+
+    def test_group_names(self):
+        # cannot be combined into one pattern
+        router = PatternRouter()
+        router.add("/(?P<n>a)", 1)
+        router.add("/(?P<n>b)", 2)
+        router.add("/b", 3)
+        self.assertEqual(router.get("/b"), 2)
+        self.assertEqual(router.get("/a"), 1)
+
+    def test_get_table(self):
+        nt = NestedTables()
+        nt.add_table("t1", ["/t1", "/t1/.*"])
+        nt.add_table("t2", ["/t2"])
+        self.assertEqual(nt.get_table("/t1/x")["name"], "t1")
+        self.assertEqual(nt.get_table("/t2")["name"], "t2")
+        self.assertIsNone(nt.get_table("/t3"))
+
+
+class TestDeduplicate(unittest.TestCase):
+    def test_insert_row(self):
+        nt = NestedTables1()
+        nt.add_table("t1", ["/t1"], auto_id=True)
+        nt.add_table("addr", ["/t1/addr"], auto_id=True, deduplicate=True)
+        for a in range(3):
+            nt.insert_row({"a": a, "addr": {"c": "x" if a < 2 else "y"}},
+                          "/t1")
+        self.assertEqual(nt.get_table("/t1/addr")["table_data"],
+                         {1: {"c": "x"}, 2: {"c": "y"}})
+        self.assertEqual(
+            [row["addr"] for row in
+             nt.get_table("/t1")["table_data"].values()], [1, 1, 2])
+
+    def test_not_in_lists(self):
+        nt = NestedTables1()
+        nt.add_table("t1", ["/t1"], auto_id=True, deduplicate=True)
+        nt.add_table("t2", ["/t1/t2"], auto_id=True, deduplicate=True)
+        for _ in range(2):
+            nt.insert_row({"t2": ["x", "x"]}, "/t1")
+        # rows from lists (and inserted directly) keep their links
+        self.assertEqual(len(nt.get_table("/t1")["table_data"]), 2)
+        self.assertEqual(nt.get_table("/t1/t2")["table_data"], {
+            1: {"t2_id": "x", "t1_id": 1}, 2: {"t2_id": "x", "t1_id": 1},
+            3: {"t2_id": "x", "t1_id": 2}, 4: {"t2_id": "x", "t1_id": 2},
+        })
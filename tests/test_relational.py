@@ -0,0 +1,197 @@
+import io
+import os
+import csv
+import json
+import sqlite3
+import tempfile
+import unittest
+from filetools.relational import (
+    iter_json_array,
+    normalize_json_file,
+    RelationalNormalizer,
+    Denormalizer,
+    CallbackSink,
+    MemorySink,
+    CsvSink,
+    SqliteSink,
+)
+from filetools.tools import structure_to_relational_tables
+
+RECORDS = [
+    {"id": 1, "name": "a", "tags": ["x", "y"], "address": {"city": "c1"}},
+    {"id": 2, "items": [{"n": 1, "sub": [[{"m": 1}], [{"m": 2}]]}]},
+    {"id": 3, "name": "c", "extra": 1.5e-3, "tags": []},
+]
+
+
+class TestIterJsonArray(unittest.TestCase):
+    def test_chunks(self):
+        text = json.dumps(RECORDS + [1.5, "a]b,", None, [], 10 ** 30])
+        for chunk_size in (1, 2, 7, 1000):
+            self.assertEqual(
+                list(iter_json_array(io.StringIO(text), chunk_size)),
+                json.loads(text))
+
+    def test_not_array(self):
+        self.assertEqual(list(iter_json_array(io.StringIO(' {"a": 1}'))),
+                         [{"a": 1}])
+        self.assertEqual(list(iter_json_array(io.StringIO(" [ ] "))), [])
+
+    def test_errors(self):
+        for text in ("[1, 2", "[1 2]", "[1, {]", "[1, ]", "[,]",
+                     "[1] x", "[] []"):
+            self.assertRaises(ValueError, list,
+                              iter_json_array(io.StringIO(text), 2))
+
+
+class TestNormalizer(unittest.TestCase):
+    def test_tables(self):
+        tables = {t["name"]: t for t in
+                  structure_to_relational_tables(RECORDS)}
+        self.assertEqual(tables["root"]["schema"],
+                         ["_id", "id", "name", "extra"])
+        self.assertEqual(tables["root"]["data"][0], (1, 1, "a", None))
+        self.assertEqual(tables["root.tags"]["data"],
+                         [(1, 1, "x"), (2, 1, "y")])
+        # list of lists: batches
+        self.assertEqual(tables["root.items.sub"]["data"],
+                         [(1, 1, 1), (2, 1, 2)])
+        self.assertEqual(tables["root.items.sub"]["schema"],
+                         ["_id", "root.items_id", "m"])
+
+    def test_batches(self):
+        batches = []
+        sink = CallbackSink(lambda *args: batches.append(args))
+        with RelationalNormalizer(sink, batch_size=2) as normalizer:
+            normalizer.add_many(RECORDS)
+        root_batches = [b for b in batches if b[0] == "root"]
+        self.assertEqual([len(b[2]) for b in root_batches], [2, 1])
+
+    def test_deep(self):
+        obj = 1
+        for _ in range(5000):
+            obj = {"a": obj}
+        tables = structure_to_relational_tables(obj)
+        self.assertEqual(len(tables), 5000)
+
+    def test_reserved(self):
+        records = [{"_id": "x", "_id_": 1, "b": [{"root_id": 2}]}]
+        tables = {t["name"]: t for t in
+                  structure_to_relational_tables(records)}
+        self.assertEqual(tables["root"]["schema"], ["_id", "_id_", "_id__"])
+        self.assertEqual(tables["root"]["data"], [(1, "x", 1)])
+        self.assertEqual(tables["root.b"]["schema"],
+                         ["_id", "root_id", "root_id_"])
+        denormalizer = Denormalizer.from_normalized(tables.values())
+        self.assertEqual(list(denormalizer.iter_documents()), records)
+
+    def test_separator_in_keys(self):
+        records = [{"a": {"b": [1]}, "a.b": [2], "a%2Eb": [3]}]
+        tables = {t["name"]: t for t in
+                  structure_to_relational_tables(records)}
+        self.assertEqual(tables["root.a.b"]["data"], [(1, 1, 1)])
+        self.assertEqual(tables["root.a%2Eb"]["data"], [(1, 1, 2)])
+        self.assertEqual(tables["root.a%252Eb"]["data"], [(1, 1, 3)])
+        denormalizer = Denormalizer.from_normalized(tables.values())
+        self.assertEqual(list(denormalizer.iter_documents()),
+                         [{"a": [{"b": [1]}], "a.b": [2], "a%2Eb": [3]}])
+
+    def test_same_table_name(self):
+        tables = structure_to_relational_tables([{1: [2], "1": [3]}])
+        self.assertEqual([t["name"] for t in tables], ["root", "root.1"])
+        self.assertEqual(tables[1]["data"], [(1, 1, 2), (2, 1, 3)])
+
+    def test_foreign_key_like_keys(self):
+        records = [{"user_id": 5, "user_id_": 6, "b": [{"root_id": 7}]}]
+        tables = {t["name"]: t for t in
+                  structure_to_relational_tables(records)}
+        self.assertEqual(tables["root"]["schema"],
+                         ["_id", "user_id", "user_id_"])
+        self.assertEqual(tables["root.b"]["schema"],
+                         ["_id", "root_id", "root_id_"])
+        denormalizer = Denormalizer.from_normalized(tables.values())
+        self.assertEqual(list(denormalizer.iter_documents()), records)
+
+
+class TestDenormalizer(unittest.TestCase):
+    def test_round_trip(self):
+        records = [{"a": i, "b": [{"c": j, "d": ["x"] * j} for j in range(i)]}
+                   for i in range(5)]
+        tables = structure_to_relational_tables(records)
+        denormalizer = Denormalizer.from_normalized(tables)
+        expected = []
+        for record in records:
+            # empty lists are lost
+            record = dict(record, b=[
+                {"c": b["c"], "d": b["d"]} if b["d"] else {"c": b["c"]}
+                for b in record["b"]
+            ])
+            if not record["b"]:
+                del record["b"]
+            expected.append(record)
+        self.assertEqual(list(denormalizer.iter_documents()), expected)
+
+    def test_reference(self):
+        tables = [
+            {"name": "p", "schema": ["_id", "name", "address"],
+             "data": [(1, "a", 10), (2, "b", None), (3, "c", 11)]},
+            {"name": "address", "schema": ["key", "city"],
+             "data": [(10, "x"), (11, "y")]},
+        ]
+        denormalizer = Denormalizer(tables)
+        denormalizer.add_reference("p", "address", "address")
+        self.assertEqual(list(denormalizer.iter_documents("p")), [
+            {"name": "a", "address": {"key": 10, "city": "x"}},
+            {"name": "b"},
+            {"name": "c", "address": {"key": 11, "city": "y"}},
+        ])
+        # only row 1 holds a reference
+        denormalizer.add_reference("p", "address", "address", row_ids={1})
+        self.assertEqual(list(denormalizer.iter_documents("p"))[2],
+                         {"name": "c", "address": 11})
+
+
+class TestSinks(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "data.json")
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump(RECORDS, file)
+        self.expected = {t["name"]: t for t in
+                         structure_to_relational_tables(RECORDS)}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_csv(self):
+        normalize_json_file(self.path, CsvSink(self.tmpdir.name),
+                            batch_size=1, chunk_size=16)
+        with open(os.path.join(self.tmpdir.name, "root.csv"),
+                  encoding="utf-8", newline="") as file:
+            rows = list(csv.reader(file))
+        expected = self.expected["root"]
+        self.assertEqual(rows[0], expected["schema"])
+        self.assertEqual(rows[1:], [
+            ["" if v is None else str(v) for v in row]
+            for row in expected["data"]
+        ])
+
+    def test_sqlite(self):
+        db_path = os.path.join(self.tmpdir.name, "data.sqlite")
+        normalize_json_file(self.path, SqliteSink(db_path), batch_size=1)
+        connection = sqlite3.connect(db_path)
+        for name, expected in self.expected.items():
+            cursor = connection.execute('SELECT * FROM "%s"' % name)
+            self.assertEqual([d[0] for d in cursor.description],
+                             expected["schema"])
+            self.assertEqual(cursor.fetchall(), expected["data"])
+        connection.close()
+
+    def test_memory(self):
+        sink = MemorySink()
+        normalize_json_file(self.path, sink, batch_size=1)
+        self.assertEqual(sink.tables, self.expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+import os
+import tempfile
+import unittest
+from text_json import Database, SqliteStore, ColumnarTable
+
+DATA = {
+    "items": [
+        {"a": i, "b": {"c": i, "d": [1, 2]}, "e": [{"f": i}],
+         "g": "x" if i % 2 else None}
+        for i in range(10)
+    ]
+}
+
+
+class TestDatabase(unittest.TestCase):
+    def test_get_data(self):
+        db = Database()
+        db.parse(DATA)
+        tables = {t["name"]: t for t in db.get_data()}
+        self.assertEqual(tables["_items_e"]["schema"],
+                         ["_id", "_items_id", "f"])
+        self.assertEqual(tables["_items_e"]["data"][1], (2, 2, 1))
+
+    def test_deep(self):
+        obj = {"v": 0}
+        for _ in range(5000):  # deeper than the recursion limit
+            obj = {"a": obj}
+        db = Database()
+        db.parse(obj)
+        self.assertEqual(len(db.tables), 5000)
+
+    def test_list_of_lists(self):
+        # every batch is parsed once
+        db = Database()
+        db.parse({"a": [[{"b": 1}, {"b": 2}], [{"b": 3}]]})
+        self.assertEqual(list(db.get_table("/a").iter_rows()),
+                         [(1, 1), (2, 2), (3, 3)])
+
+
+class TestDocuments(unittest.TestCase):
+    def test_round_trip(self):
+        db = Database()
+        db.parse(DATA)
+        documents = list(db.iter_documents("/items"))
+        # None values are not stored
+        expected = [{k: v for k, v in item.items() if v is not None}
+                    for item in DATA["items"]]
+        self.assertEqual(documents, expected)
+
+    def test_mixed_values_and_dicts(self):
+        data = {"p": [{"k": {"v": "A"}}, {"k": {"v": "B"}}, {"k": 1}]}
+        db = Database()
+        db.parse(data)
+        self.assertEqual(list(db.iter_documents("/p")), data["p"])
+
+    def test_up(self):
+        db = Database(link_1_1_relation="up")
+        db.parse({"items": [{"a": {"b": 1}, "c": [{"d": 2}]}]})
+        self.assertEqual(list(db.iter_documents("/items")),
+                         [{"a": [{"b": 1}], "c": [{"d": 2}]}])
+
+
+class TestDeduplicate(unittest.TestCase):
+    def test_deduplicate(self):
+        items = [{"a": i, "unit": {"name": "m", "si": {"f": 1}}}
+                 for i in range(100)]
+        items.append({"a": 0, "unit": {"si": {"f": 1}, "name": "m"}})
+        db = Database(deduplicate=True)
+        db.parse({"items": items})
+        self.assertEqual(len(db.get_table("/items/unit").data), 1)
+        self.assertEqual(len(db.get_table("/items/unit/si").data), 1)
+        # items are not linked down: all are kept
+        self.assertEqual(len(db.get_table("/items").data), 101)
+        self.assertEqual(list(db.iter_documents("/items")), items)
+
+    def test_not_in_lists(self):
+        db = Database(deduplicate=True)
+        data = {"a": {"b": [{"c": 1}, {"c": 1}], "d": [{"c": 1}]}}
+        db.parse(data)
+        self.assertEqual(len(db.get_table("/a/b").data), 2)
+        self.assertEqual(list(db.iter_documents("/a")), [data["a"]])
+
+    def test_not_with_parent(self):
+        # rows linked up to their parent are never deduplicated
+        db = Database(deduplicate=True, link_1_1_relation="up")
+        db.parse({"items": [{"a": i, "unit": {"name": "m"}}
+                            for i in range(3)]})
+        self.assertEqual(len(db.get_table("/items/unit").data), 3)
+
+
+class TestParallel(unittest.TestCase):
+    def test_same_as_serial(self):
+        records = DATA["items"] + [
+            {"a": i, "ref": {"rid": i % 3}, "h": {"i": {"j": i}}}
+            for i in range(20)
+        ]
+        for link in ("down", "up", "both"):
+            dbs = []
+            for _ in range(2):
+                db = Database(link_1_1_relation=link)
+                db.create_table("/ref", id_column="rid")
+                db.parse(records[:3])
+                dbs.append(db)
+            dbs[0].parse(records[3:])
+            dbs[1].parse_parallel(records[3:], workers=2, shard_size=4)
+            self.assertEqual(dbs[0].get_data(), dbs[1].get_data())
+
+    def test_mixed_values_and_dicts(self):
+        # k holds ids of dicts linked down in some records, values in others
+        d = {"x": {"k": {"v": 1}}}
+        for value in (5, "n/a"):
+            records = [d, d, d, {"x": {"k": value}}, d]
+            db = Database()
+            db.parse(records)
+            db_parallel = Database()
+            db_parallel.parse_parallel(records, workers=2, shard_size=2)
+            self.assertEqual(db.get_data(), db_parallel.get_data())
+            self.assertEqual(db_parallel.links["/x"], {"k": {1, 2, 3, 5}})
+
+    def test_columnar(self):
+        records = [{"a": i, "b": [{"c": i * 0.5}] * (i % 3), "d": [i]}
+                   for i in range(10)]
+        db = Database(table_class=ColumnarTable)
+        db.parse(records)
+        db_parallel = Database(table_class=ColumnarTable)
+        db_parallel.parse_parallel(records, workers=2, shard_size=3)
+        self.assertEqual(db.get_data(), db_parallel.get_data())
+        self.assertEqual(list(db_parallel.get_table("/b").index),
+                         list(range(1, 10)))
+
+    def test_values(self):
+        db = Database()
+        db.parse(list(range(10)))
+        db_parallel = Database()
+        db_parallel.parse_parallel(list(range(10)), workers=2, shard_size=3)
+        self.assertEqual(db.get_data(), db_parallel.get_data())
+
+
+class TestColumnarTable(unittest.TestCase):
+    def test_same_data(self):
+        db = Database(table_class=ColumnarTable)
+        db.parse(DATA)
+        db_dict = Database()
+        db_dict.parse(DATA)
+        self.assertEqual(db.get_data(), db_dict.get_data())
+        table = db.get_table("/items")
+        self.assertEqual(table.data[3], {"a": 2, "b": 3})
+        # typed column
+        self.assertEqual(table.column("a").tolist(), list(range(10)))
+
+    def test_parse_after_export(self):
+        db = Database(table_class=ColumnarTable)
+        db.parse({"t": [{"x": 1}, {"x": 2}]})
+        values = db.get_table("/t").column("x")
+        db.parse({"t": [{"x": 3}]})
+        self.assertEqual(values.tolist(), [1, 2])
+        self.assertEqual(db.get_table("/t").column("x").tolist(), [1, 2, 3])
+
+    def test_freeze(self):
+        db = Database(table_class=ColumnarTable)
+        db.parse({"t": [{"x": 1}, {"x": 2}]})
+        table = db.get_table("/t")
+        table.freeze()
+        values = table.column("x")
+        # a view of the stored array, not a copy
+        self.assertIs(values.obj, table.table.get_column("x").values)
+        self.assertTrue(values.readonly)
+        self.assertEqual(values.tolist(), [1, 2])
+        self.assertRaises(Exception, db.parse, {"t": [{"x": 3}]})
+
+    def test_update(self):
+        table = ColumnarTable("t", id_column="id")
+        record_id = table.create_record({"id": "x"})
+        table.update_record(record_id, {"id": "x", "v": 1})
+        self.assertRaises(Exception, table.update_record, record_id,
+                          {"v": 2})
+        table.update_record(record_id, {"v": 2.5}, allow_value_update=True)
+        self.assertEqual(list(table.iter_rows()), [("x", 2.5)])
+
+
+class TestSqliteStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_spill(self):
+        store = SqliteStore(os.path.join(self.tmpdir.name, "db.sqlite"),
+                            batch_size=3, spill_threshold=4)
+        db = Database(store=store)
+        db.parse(DATA)
+        # only completed records are kept in memory
+        self.assertLess(len(db.get_table("/items").data), 4)
+        data = db.get_data()
+        db_memory = Database()
+        db_memory.parse(DATA)
+        self.assertEqual(data, db_memory.get_data())
+        indexes = [row[0] for row in store.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")]
+        self.assertIn("_items_e___items_id", indexes)
+        store.close()
+
+    def test_spill_columnar(self):
+        store = SqliteStore(os.path.join(self.tmpdir.name, "db.sqlite"),
+                            spill_threshold=4)
+        db = Database(store=store, table_class=ColumnarTable)
+        db.parse(DATA)
+        db_memory = Database()
+        db_memory.parse(DATA)
+        self.assertEqual(db.get_data(), db_memory.get_data())
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
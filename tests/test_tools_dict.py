@@ -1,7 +1,27 @@
 import os
+import re
+import pickle
+import asyncio
+import tempfile
 import unittest
-from filetools.tools import Dict
-from filetools.classes import FileTool
+from filetools.tools import (
+    Dict,
+    FastDict,
+    structure_to_flat_dict,
+    iter_flat_items,
+    flat_dict_to_structure,
+    records_to_columns,
+    columns_to_records,
+    Filter,
+    compile_glob,
+    get_structure_digest,
+)
+from filetools.classes import (
+    FileTool,
+    FileResource,
+    FileInspector,
+    get_meta_key,
+)
 
 data_dir = os.path.join(os.path.dirname(__file__), "data")
 
@@ -13,8 +33,10 @@ def get_data_file(filename):
 
 
 class TestDictLowercaseNoUpdate(unittest.TestCase):
+    dict_class = Dict
+
     def test_normal(self):
-        dict_normal = Dict()
+        dict_normal = self.dict_class()
         dict_normal["A"] = 1
         self.assertEqual(dict_normal.get("a"), None)
         # can put "a" in as well
@@ -24,7 +46,8 @@ class TestDictLowercaseNoUpdate(unittest.TestCase):
         self.assertEqual(len(dict_normal), 1)
 
     def test_mod(self):
-        dict_mod = Dict(allow_overwrite=False, get_key=lambda x: str(x).lower())
+        dict_mod = self.dict_class(allow_overwrite=False,
+                                   get_key=lambda x: str(x).lower())
         dict_mod["A"] = 1
         self.assertEqual(dict_mod["a"], 1)
         # cannot put "a" in again
@@ -40,11 +63,176 @@ class TestDictLowercaseNoUpdate(unittest.TestCase):
         self.assertTrue("a" in dict_mod)
 
     def test_add_default(self):
-        dct = Dict()
+        dct = self.dict_class()
         dct.get("a", [], add_on_missing=True).append(1)
         self.assertEqual(dct["a"], [1])
 
 
+class TestFastDict(TestDictLowercaseNoUpdate):
+    dict_class = FastDict
+
+    def test_mutable_mapping(self):
+        dct = FastDict(get_key=str.lower)
+        dct.update({"A": 1, "b": 2}, C=3)
+        dct["a"] = 4  # keeps position, new original key
+        self.assertEqual(list(dct.items()), [("a", 4), ("b", 2), ("C", 3)])
+        self.assertEqual(list(dct), ["a", "b", "C"])
+        self.assertIn("B", dct.keys())
+        self.assertIn(("c", 3), dct.items())
+        self.assertEqual(dct.pop("B"), 2)
+        self.assertEqual(dct, {"a": 4, "C": 3})
+        self.assertEqual(dct.setdefault("D", 5), 5)
+        self.assertEqual(list(dct.values()), [4, 3, 5])
+
+    def test_pickle(self):
+        dct = FastDict(get_key=get_meta_key)
+        dct["Key"] = 1
+        dct2 = pickle.loads(pickle.dumps(dct))
+        self.assertEqual(dct2["KEY"], 1)
+        self.assertEqual(list(dct2.keys()), ["Key"])
+
+    def test_equal_keys_of_different_types(self):
+        FastDict(get_key=get_meta_key)[1] = 1
+        for dict_class in (Dict, FastDict):
+            dct = dict_class(get_key=get_meta_key)
+            dct["1"] = "str"
+            dct[True] = "bool"
+            self.assertEqual(dct["1"], "str")
+            self.assertEqual(dct["TRUE"], "bool")
+
+
+class TestFlatDict(unittest.TestCase):
+    def test_deep(self):
+        # deeper than the recursion limit
+        obj = value = {}
+        for _ in range(2000):
+            value["a"] = [{}]
+            value = value["a"][0]
+        value["b"] = 1
+        res = structure_to_flat_dict(obj)
+        self.assertEqual(list(res.values()), [1])
+        self.assertEqual(list(res)[0], "a.#0." * 2000 + "b")
+
+    def test_lazy(self):
+        items = iter_flat_items({"a": 1, "b": {"c": [2]}})
+        self.assertEqual(next(items), ("a", 1))
+        self.assertEqual(list(items), [("b.c.#0", 2)])
+        self.assertRaises(Exception, structure_to_flat_dict, 1)
+
+    def test_round_trip(self):
+        obj = {"a": [1, {"b": None, "c": [[2, 3], []]}], "d": {"e": "f"}}
+        # empty containers are lost
+        expected = {"a": [1, {"b": None, "c": [[2, 3]]}], "d": {"e": "f"}}
+        self.assertEqual(flat_dict_to_structure(iter_flat_items(obj)),
+                         expected)
+
+    def test_tuple_paths(self):
+        obj = {1: [{"a.b": None}, ["#"]], (2, 3): {4: 5}}
+        flat = structure_to_flat_dict(obj, tuple_paths=True)
+        self.assertEqual(flat, {(1, 0, "a.b"): None, (1, 1, 0): "#",
+                                ((2, 3), 4): 5})
+        self.assertEqual(flat_dict_to_structure(flat, tuple_paths=True), obj)
+        # plain ints are dict keys
+        self.assertEqual(flat_dict_to_structure({(0,): 1}, tuple_paths=True),
+                         {0: 1})
+
+    def test_unfold_errors(self):
+        self.assertRaises(KeyError, flat_dict_to_structure, {"#1": 1})
+        self.assertRaises(Exception, flat_dict_to_structure,
+                          {"#0": 1, "a": 2})
+        self.assertRaises(Exception, flat_dict_to_structure,
+                          [("a", None), ("a.b", 1)])
+
+    def test_records_to_columns(self):
+        records = [{"id": i, "tags": ["x"] * (i % 3), "v": {"w": i / 2}}
+                   for i in range(10)]
+        records.append({"id": "last", "extra": None})
+        table = records_to_columns(records)
+        self.assertEqual(len(table), 11)
+        self.assertEqual(table.get_column("v.w").typecode, "d")
+        # mixed types fall back to a list
+        self.assertEqual(table.column("id")[-1], "last")
+        self.assertIsNone(table.column("tags.#1")[0])
+        # empty lists are lost
+        expected = [structure_to_flat_dict(r) for r in records]
+        self.assertEqual([structure_to_flat_dict(r)
+                          for r in columns_to_records(table)], expected)
+        tuple_table = records_to_columns(records, tuple_paths=True)
+        self.assertEqual(list(columns_to_records(tuple_table,
+                                                 tuple_paths=True))[-1],
+                         records[-1])
+
+
+class TestFilter(unittest.TestCase):
+    def test_patterns(self):
+        f = Filter(required=["id", re.compile("NAME_.", re.I)],
+                   optional=[compile_glob("x*")],
+                   ignored=[compile_glob("*_tmp"), "x_skip"])
+        self.assertEqual(f(["name_1", "x_tmp", "x_skip", "xy", "id"]),
+                         ["name_1", "xy", "id"])
+        # the same item again (memoized)
+        self.assertEqual(f(["id", "name_1", "name_1"]),
+                         ["id", "name_1", "name_1"])
+        self.assertRaises(KeyError, f, ["id", "xy"])
+        self.assertRaises(KeyError, f, ["id", "name_1", "y"])
+
+    def test_streaming(self):
+        def items():
+            yield "a"
+            yield "b"
+            raise AssertionError("consumed too much")
+
+        f = Filter(required=["a"])
+        consumed = f.iter(items())
+        self.assertEqual(next(consumed), "a")
+        self.assertRaises(KeyError, next, consumed)
+
+    def test_inline_flags(self):
+        f = Filter(optional=[re.compile("(?i)abc"), re.compile("x")])
+        self.assertEqual(f(["ABC", "abc", "x"]), ["ABC", "abc", "x"])
+        self.assertRaises(KeyError, f, ["X"])
+
+    def test_same_group_name(self):
+        f = Filter(required=[re.compile("(?P<n>a+)"),
+                             re.compile("(?P<n>b+)")])
+        self.assertEqual(f(["aa", "b"]), ["aa", "b"])
+        self.assertRaises(KeyError, f, ["aa"])
+
+    def test_numbered_reference(self):
+        f = Filter(ignored=[re.compile("b")],
+                   optional=[re.compile(r"(a)\1")])
+        self.assertEqual(f(["b", "aa"]), ["aa"])
+        self.assertRaises(KeyError, f, ["a"])
+
+
+class TestStructureDigest(unittest.TestCase):
+    def test_equal(self):
+        obj = {"a": [1, {"b": "x"}], "c": None, "d": {}}
+        self.assertIsInstance(get_structure_digest(obj), bytes)
+        self.assertEqual(
+            get_structure_digest(obj),
+            get_structure_digest({"d": {}, "c": None,
+                                  "a": [1, {"b": "x"}]}))
+
+    def test_different(self):
+        objs = [
+            [1], [True], ["1"], [1.0], [[1]], [1, 2], [[1], 2], [1, [2]],
+            [], {}, [{}], ["a\x00b"], ["a", "b"], {"a": 1}, {"1": "a"},
+            ["#" + get_structure_digest([1]).hex()], [b"1"], 1,
+        ]
+        digests = {get_structure_digest(obj) for obj in objs}
+        self.assertEqual(len(digests), len(objs))
+
+    def test_memo(self):
+        inner = {"b": [1, 2]}
+        digests = {}
+        digest = get_structure_digest({"a": inner}, digests)
+        self.assertEqual(digests[id(inner)], get_structure_digest(inner))
+        # nested containers are hashed only once
+        inner["b"].append(3)
+        self.assertEqual(get_structure_digest({"a": inner}, digests), digest)
+
+
 class TestFileToolBytes(unittest.TestCase):
     def setUp(self):
         self.ft = FileTool()
@@ -55,5 +243,173 @@ class TestFileToolBytes(unittest.TestCase):
         self.assertEqual(meta["size_bytes"], 0)
 
 
+class FileDoc(FileResource):
+    file_type = "doc"
+    magic_bytes = [b"DOC"]
+
+
+class FileDocX(FileResource):
+    file_type = "doc/x"
+
+    @classmethod
+    def sniff(cls, prefix):
+        return prefix.startswith(b"DOCX")
+
+
+class DocInspector(FileInspector):
+    file_types = ["doc"]
+
+
+class TestFileTypes(unittest.TestCase):
+    def test_table(self):
+        ft = FileTool()
+        self.assertEqual(ft.identify_file(None, "doc/x").file_type, "")
+        ft.register_file_class(FileDoc)
+        ft.register_file_class(DocInspector)
+        # table is rebuilt on registration
+        self.assertIs(ft.identify_file(None, "doc/x"), FileDoc)
+        self.assertIs(ft.identify_file(None, "image"), ft.identify_file(None))
+        resource_class, inspectors = ft.get_file_type_entry("doc")
+        self.assertEqual(ft.resolve_file_type("doc"),
+                         (resource_class, inspectors))
+        self.assertEqual(inspectors[-1], DocInspector)
+
+
+class TestSniffer(unittest.TestCase):
+    def setUp(self):
+        self.ft = FileTool()
+        self.ft.register_file_class(FileDoc)
+        self.ft.register_file_class(FileDocX)
+
+    def test_sniff(self):
+        sniff = self.ft.sniffer.sniff
+        self.assertEqual(sniff(b""), "")
+        self.assertEqual(sniff(b"\x00\x01"), "")
+        self.assertEqual(sniff(b"plain text"), "text")
+        self.assertEqual(sniff(b"DOC\x00"), "doc")
+        self.assertEqual(sniff(b"DOCX\x00"), "doc/x")
+
+    def test_identify_file(self):
+        self.assertEqual(
+            self.ft.identify_file(get_data_file("empty_file")).file_type, "")
+        self.assertEqual(self.ft.identify_file(__file__).file_type, "text")
+
+    def test_no_sniffing(self):
+        # all detectable file types have the same inspectors
+        self.assertIsNotNone(self.ft.common_inspectors)
+
+        def sniff_file(path):
+            raise AssertionError("file must not be read")
+
+        self.ft.sniffer.sniff_file = sniff_file
+        meta = self.ft.inspect_file(__file__)
+        self.assertEqual(meta["size_bytes"], os.path.getsize(__file__))
+        # content decides about the inspectors
+        self.ft.register_file_class(DocInspector)
+        self.assertIsNone(self.ft.common_inspectors)
+        self.assertEqual(self.ft.identify_file(__file__).file_type, "text")
+
+
+class HeadInspector(FileInspector):
+    file_types = [""]
+
+    @classmethod
+    def inspect_file(cls, path):
+        raise AssertionError("file must not be read again")
+
+    @classmethod
+    def inspect_buffer(cls, path, buffer):
+        return {"head": bytes(buffer[:6])}
+
+
+class TestSharedBuffer(unittest.TestCase):
+    def setUp(self):
+        self.ft = FileTool(shared_buffer=True)
+        self.ft.register_file_class(HeadInspector)
+
+    def test_buffer(self):
+        meta = self.ft.inspect_file(__file__)
+        self.assertEqual(meta["size_bytes"], os.path.getsize(__file__))
+        self.assertEqual(meta["head"], b"import")
+
+    def test_empty(self):
+        meta = self.ft.inspect_file(get_data_file("empty_file"))
+        self.assertEqual(meta["size_bytes"], 0)
+        self.assertEqual(meta["head"], b"")
+
+
+class TestFileToolMany(unittest.TestCase):
+    def setUp(self):
+        self.ft = FileTool()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.sizes = {}
+        for i in range(20):
+            subdir = os.path.join(self.tmpdir.name, "d%d" % (i % 3))
+            os.makedirs(subdir, exist_ok=True)
+            path = os.path.join(subdir, "f%d" % i)
+            with open(path, "wb") as file:
+                file.write(b"x" * i)
+            self.sizes[path] = i
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_inspect_tree_thread(self):
+        res = {p: m["size_bytes"] for p, m in
+               self.ft.inspect_tree(self.tmpdir.name, workers=2, max_pending=3)}
+        self.assertEqual(res, self.sizes)
+
+    def test_inspect_many_process(self):
+        res = {p: m["size_bytes"] for p, m in
+               self.ft.inspect_many(self.sizes, workers=2, executor="process")}
+        self.assertEqual(res, self.sizes)
+
+    def test_inspect_table(self):
+        table = self.ft.inspect_table(self.sizes, workers=2)
+        self.assertEqual(len(table), len(self.sizes))
+        res = dict(zip(table.column("path"), table.column("SIZE_BYTES")))
+        self.assertEqual(res, self.sizes)
+
+    def test_invalid_executor(self):
+        self.assertRaises(ValueError, list,
+                          self.ft.inspect_many(self.sizes, executor="x"))
+
+
+class AsyncInspector(FileInspector):
+    file_types = [""]
+
+    @classmethod
+    async def inspect_file(cls, path):
+        await asyncio.sleep(0)
+        return {"async": os.path.basename(path)}
+
+
+class TestFileToolAsync(TestFileToolMany):
+    def setUp(self):
+        super().setUp()
+        self.ft.register_file_class(AsyncInspector)
+
+    async def collect(self, results):
+        return {p: (m["size_bytes"], m["async"]) async for p, m in results}
+
+    def check(self, res):
+        self.assertEqual(res, {p: (s, os.path.basename(p))
+                               for p, s in self.sizes.items()})
+
+    def test_inspect_many_async(self):
+        results = self.ft.inspect_many_async(iter(self.sizes), concurrency=3)
+        self.check(asyncio.run(self.collect(results)))
+
+    def test_inspect_tree_async(self):
+        results = self.ft.inspect_tree_async(self.tmpdir.name)
+        self.check(asyncio.run(self.collect(results)))
+
+    def test_sync(self):
+        # coroutine inspectors also work in synchronous mode
+        path = next(iter(self.sizes))
+        self.assertEqual(self.ft.inspect_file(path)["async"],
+                         os.path.basename(path))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,12 +1,26 @@
+import os
+from itertools import repeat
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from filetools.columns import ColumnTable, RowView
+from filetools.tools import get_structure_digest
+from filetools.relational import SqliteSink, Denormalizer, quote_identifier
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_SPILL_THRESHOLD = 100000
+AUTO_ID_COLUMN = '_id'
+
+
 class Table:
     def __init__(self, name, id_column=None, ref_id_column=None):
         self.name = name
-        self.auto_id_column = '_id'
+        self.auto_id_column = AUTO_ID_COLUMN
         self.id_column = id_column or self.auto_id_column
         self.ref_id_column = ref_id_column or ('%s_id' % self.name)
         self.n_records = 0
+        self.n_open = 0  # created, but not yet updated
         self.data = {}
-        self.columns = set()
+        self.columns = {}  # ordered set
 
     def create_record(self, data):
         """
@@ -14,6 +28,7 @@ class Table:
             record_id
         """
         self.n_records += 1
+        self.n_open += 1
         if self.id_column == self.auto_id_column:
             key = self.n_records
         else:
@@ -26,14 +41,236 @@ class Table:
         for k, v in record.items():
             if k in rec and not allow_value_update:
                 raise Exception('Not allowed to overwrite existing value for %s.' % k)
-            self.columns.add(k)
+            self.columns[k] = None
             rec[k] = v
+        self.n_open = max(self.n_open - 1, 0)
+
+    def extend(self, table):
+        """add the records of another table with the same name and other
+        record ids (e.g. parsed in another process)"""
+        self.columns.update(table.columns)
+        self.data.update(table.data)
+
+    def get_schema(self):
+        """
+        Returns:
+            list of column names, id column first
+        """
+        return [self.id_column] + [c for c in self.columns if c != self.id_column]
+
+    def iter_rows(self):
+        """
+        Yields:
+            tuple of values for each record, see get_schema
+        """
+        columns = self.get_schema()[1:]
+        for record_id, rec in self.data.items():
+            yield (record_id,) + tuple(rec.get(c) for c in columns)
+
+    def clear(self):
+        """remove all records from memory (ids keep counting)"""
+        self.data = {}
+
+
+class _RecordsView(Mapping):
+    """read only dict like view record_id -> record of a ColumnarTable"""
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getitem__(self, record_id):
+        return dict(RowView(self._table.table, self._table.index[record_id]))
+
+    def __iter__(self):
+        return iter(self._table.index)
+
+    def __len__(self):
+        return len(self._table.index)
+
+
+class ColumnarTable(Table):
+    def __init__(self, name, id_column=None, ref_id_column=None):
+        """Table storing records column by column.
+
+        Every column is a growable typed array (int, float) or list,
+        missing cells are tracked in a mask, and `index` maps record ids
+        to row numbers, so there is no dict per record.
+        `data` is a read only view with the same content as in Table.
+        """
+        super().__init__(name=name, id_column=id_column, ref_id_column=ref_id_column)
+        self.clear()
+
+    @property
+    def data(self):
+        return _RecordsView(self)
+
+    @data.setter
+    def data(self, data):
+        # only used by Table.__init__
+        if data:
+            raise Exception('Not allowed to set data of a ColumnarTable.')
+
+    def create_record(self, data):
+        """
+        Returns:
+            record_id
+        """
+        self.n_records += 1
+        self.n_open += 1
+        if self.id_column == self.auto_id_column:
+            key = self.n_records
+        else:
+            key = data[self.id_column]
+        # a new (empty) row, also if key exists: the old row is unused
+        self.index[key] = self.table.append(())
+        return key
+
+    def update_record(self, record_id, record, allow_value_update=False):
+        row = self.index[record_id]
+        for k, v in record.items():
+            column = self.table.get_column(k, create=True)
+            column.pad(row + 1)
+            if not column.is_missing(row) and not allow_value_update:
+                raise Exception('Not allowed to overwrite existing value for %s.' % k)
+            self.columns[k] = None
+            column[row] = v
+        self.n_open = max(self.n_open - 1, 0)
+
+    def extend(self, table):
+        """add the records of another ColumnarTable, column by column"""
+        self.columns.update(table.columns)
+        start = self.table.append_table(table.table)
+        self.index.update((k, start + row) for k, row in table.index.items())
+
+    def iter_rows(self):
+        """
+        Yields:
+            tuple of values for each record, see get_schema
+        """
+        n_rows = len(self.table)
+        columns = []
+        for name in self.get_schema()[1:]:
+            column = self.table.get_column(name)
+            column.pad(n_rows)
+            columns.append(column)
+        for record_id, row in self.index.items():
+            yield (record_id,) + tuple(column[row] for column in columns)
+
+    def column(self, name):
+        """Return all values of a column (None for missing values).
+
+        Rows are in order of creation (see `index`). The values are copied,
+        unless the table is frozen, see ColumnTable.column
+        """
+        return self.table.column(name)
+
+    def freeze(self):
+        """Make the table read only: `column` returns typed values without
+        copying them, as read only memoryview (see ColumnTable.freeze).
+        Parsing into the table raises an Exception."""
+        self.table.freeze()
+
+    def clear(self):
+        """remove all records from memory (ids keep counting)"""
+        self.table = ColumnTable()
+        self.index = {}  # record_id -> row
+        # keep the order of the schema
+        for name in self.columns:
+            self.table.get_column(name, create=True)
+
+
+class SqliteStore:
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, spill_threshold=DEFAULT_SPILL_THRESHOLD):
+        """SQLite backend for Database.
+
+        Completed records of a table are written to the database (one
+        SQLite table per Table) once it holds `spill_threshold` records,
+        and on `Database.flush`. Indexes on the foreign key columns are
+        created by `Database.flush`.
+
+        Args:
+            path(str): path of the database file
+            batch_size(int): rows per executemany
+            spill_threshold(int): maximum number of records per table in memory
+        """
+        self.sink = SqliteSink(path)
+        self.connection = self.sink.connection
+        self.batch_size = batch_size
+        self.spill_threshold = spill_threshold
+
+    def spill(self, table):
+        """write all records of table to the database"""
+        if not table.data:
+            return
+        self.sink.primary_keys[table.name] = table.id_column
+        columns = table.get_schema()
+        batch = []
+        for row in table.iter_rows():
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.sink.write(table.name, columns, batch)
+                batch = []
+        if batch:
+            self.sink.write(table.name, columns, batch)
+        table.clear()
+
+    def maybe_spill(self, table):
+        if len(table.data) >= self.spill_threshold and not table.n_open:
+            self.spill(table)
+
+    def create_indexes(self):
+        self.sink.create_indexes(suffix='_id')
+
+    def iter_rows(self, table):
+        if table.name not in self.sink.primary_keys:
+            return iter(())
+        return self.connection.execute('SELECT * FROM %s' % quote_identifier(table.name))
+
+    def close(self):
+        self.sink.close()
+
+
+class _PathNode:
+    """table path in the nested structure, with cached children and table"""
+
+    __slots__ = ('path', 'children', 'table', 'digests', 'links')
+
+    def __init__(self, path, digests, links):
+        self.path = path
+        self.children = {}  # key -> _PathNode
+        self.table = None  # resolved on first use
+        self.digests = digests  # digest -> record_id (deduplicate)
+        self.links = links  # column -> record ids with a linked down id
 
 
 class Database:
-    def __init__(self, table_path_map=None, auto_create=True, allow_value_update=True, allow_single_value=True, list_of_list='batch', link_1_1_relation='down'):
+    def __init__(self, table_path_map=None, auto_create=True, allow_value_update=True, allow_single_value=True, list_of_list='batch', link_1_1_relation='down', store=None, table_class=None, deduplicate=False):
+        """
+        Args:
+            store(SqliteStore, optional): write tables to a database instead
+                of keeping all records in memory
+            table_class(class, optional): Table (default) or ColumnarTable
+            deduplicate(bool): dicts linked down (their id is stored in the
+                parent record, and they have no foreign key to it) that are
+                equal to an existing record of the same path (including nested
+                data) are not inserted again, the existing record id is used
+        """
+        self.store = store
+        self.table_class = table_class or Table
+        self.deduplicate = deduplicate
+        self._digests = {}  # id(obj) -> digest, during parse
+        self._path_digests = {}  # table_path -> {digest: record_id}
         self.auto_create = auto_create
         self.tables = {}
+        self.ref_columns = {}  # ref_id_column -> table_path
+        self._path_nodes = {}  # table_path -> _PathNode
+        self.references = {}  # table_path -> {column: referenced table_path}
+        # table_path -> {column: set of record ids}: records in which a column
+        # holds the id of a dict linked down (other records may hold values)
+        self.links = {}
+        # table_path -> number of ids reserved before the first record of a
+        # new table, see parse_parallel
+        self.id_offsets = {}
         self.table_path_map = table_path_map or {}
         self.allow_value_update = allow_value_update
         self.allow_single_value = allow_single_value
@@ -45,21 +282,38 @@ class Database:
     def create_table(self, table_path, name=None, id_column=None, alias_paths=None):
         assert table_path not in self.tables
         name = name or self.get_table_name_from_path(table_path)
-        self.tables[table_path] = Table(name=name, id_column=id_column)
+        table = self.tables[table_path] = self.table_class(name=name, id_column=id_column)
+        table.n_records = self.id_offsets.get(table_path, 0)
+        self.ref_columns[table.ref_id_column] = table_path
         for p in (alias_paths or []):
             self.table_path_map[p] = table_path
+        if alias_paths:
+            # cached tables of paths may have changed
+            self._path_nodes = {}
+
+    def resolve_table_path(self, table_path):
+        return self.table_path_map.get(table_path, table_path)
 
     def get_table(self, table_path):
         """
         Returns:
             Table
         """
-        if table_path in self.table_path_map:
-            table_path = self.table_path_map[table_path]
+        table_path = self.resolve_table_path(table_path)
         if table_path not in self.tables and self.auto_create:
             self.create_table(table_path=table_path)
         return self.tables[table_path]
 
+    def add_reference(self, table_path, column, ref_table_path):
+        """remember that `column` in a table holds record ids of another table"""
+        refs = self.references.setdefault(self.resolve_table_path(table_path), {})
+        if column not in refs:
+            refs[column] = self.resolve_table_path(ref_table_path)
+
+    def add_references(self, table_path, ref):
+        for k in ref:
+            self.add_reference(table_path, k, self.ref_columns[k])
+
 
     def get_table_name_from_path(self, table_path):
         return table_path.replace('/', '_')
@@ -89,83 +343,164 @@ class Database:
         return path + '/' + item
 
 
-    def parse_dict(self, obj, table_path='', ref=None):
-        """Place record in the database.
+    def get_path_node(self, table_path):
+        """
+        Returns:
+            _PathNode (cached)
+        """
+        node = self._path_nodes.get(table_path)
+        if node is None:
+            node = self._path_nodes[table_path] = _PathNode(
+                table_path, self._path_digests.setdefault(table_path, {}),
+                self.links.setdefault(self.resolve_table_path(table_path), {}))
+        return node
 
-        Args:
-            obj(dict): possibly nestewd record data
+    def get_child_node(self, node, key):
+        child = node.children.get(key)
+        if child is None:
+            child = node.children[key] = self.get_path_node(self.join_path(node.path, key))
+        return child
 
-        Returns:
-            record id
+    def get_node_table(self, node):
+        table = node.table
+        if table is None:
+            table = node.table = self.get_table(node.path)
+        return table
 
-        """
+    def _start_dict(self, stack, obj, node, ref, linked_down=False):
         record = {}  # flat dict
-        for k, v in (ref or {}).items():
-            record[k] = v
+        if ref:
+            self.add_references(node.path, ref)
+            record.update(ref)
 
-        if table_path:  # not in root
-            table = self.get_table(table_path=table_path)
+        digest = None
+        # only if the returned id is stored in the parent record
+        if self.deduplicate and linked_down and not ref:
+            # structural hash, nested dicts are hashed only once (bottom up)
+            digest = get_structure_digest(obj, self._digests)
+            record_id = node.digests.get(digest)
+            if record_id is not None:
+                return record_id
+
+        if node.path:  # not in root
+            table = self.get_node_table(node)
             record_id = table.create_record(data=obj)
             ref = {table.ref_id_column: record_id}
+            if digest is not None:
+                node.digests[digest] = record_id
         else:  # no ref on root
             ref = None
             table = None
             record_id = None
+        stack.append((True, node, iter(obj.items()), ref, record, table, record_id))
+        return record_id
 
-        for k, v in obj.items():
-            ref_table_path = self.join_path(table_path, k)
-            v_type = self.get_item_type(v)
-            if v_type == 'dict':
-                # parse object in separate list. optionally, we could also link directly to the item,
-                # since it's exactly one
-                if self.link_1_1_relation == 'down':
-                    v = self.parse_dict(obj=v, table_path=ref_table_path, ref=None)
-                elif self.link_1_1_relation == 'up':
-                    self.parse_dict(obj=v, table_path=ref_table_path, ref=ref)
-                    v = None
-                else:  # both
-                    v = self.parse_dict(obj=v, table_path=ref_table_path, ref=ref)
-            elif v_type == 'list':
-                # do not add a field, instead: parse list as new table and add thid record's id to link it
-                self.parse_list(obj=v, table_path=ref_table_path, ref=ref)
-                v = None
-            else:
-                pass
-            if v is not None:
-                record[k] = v
+    def _start_list(self, stack, obj, node, ref):
+        list_items_type = self.get_list_items_type(obj)
+        stack.append((False, node, iter(obj), ref, list_items_type, None, None))
 
-        # not in root
-        if table_path:
-            table.update_record(record_id=record_id, record=record, allow_value_update=self.allow_value_update)
-            return record_id
+    def _parse(self, stack):
+        """process the stack of dicts and lists until it is empty
 
-    def parse_list(self, obj, table_path='', ref=None):
-        list_items_type = self.get_list_items_type(obj)
-        for v in obj:
-            if list_items_type == 'dict':
-                ref_record_id = self.parse_dict(obj=v,table_path=table_path, ref=ref)
-            elif list_items_type == 'list':
-                # list of lists: not well defined. we could interpret it as
-                # just multiple batches of data
-                if self.list_of_list == 'batch':
-                    for ls in obj:
-                        self.parse_list(obj=ls, table_path=table_path, ref=ref)
+        Items of a dict/list are processed in order, nested dicts and lists
+        are pushed on the stack, so records are created (ids!) and updated
+        in the same order as in a recursive traversal.
+        """
+        link_down = self.link_1_1_relation in ('down', 'both')
+        link_up = self.link_1_1_relation in ('up', 'both')
+        # dicts linked down to a stored (not root) record can be deduplicated
+        deduplicate = self.deduplicate and link_down
+        while stack:
+            is_dict, node, items, ref, state, table, record_id = stack[-1]
+            if is_dict:
+                record = state
+                for k, v in items:
+                    if isinstance(v, dict):
+                        # parse object in separate table. optionally, we could also link directly to the item,
+                        # since it's exactly one
+                        child = self.get_child_node(node, k)
+                        child_id = self._start_dict(stack, v, child, ref if link_up else None,
+                                                    linked_down=deduplicate and bool(node.path))
+                        if link_down and child_id is not None:
+                            if node.path:
+                                self.add_reference(node.path, k, child.path)
+                                node.links.setdefault(k, set()).add(record_id)
+                            record[k] = child_id
+                        break
+                    elif isinstance(v, (list, tuple)):
+                        # do not add a field, instead: parse list as new table and add thid record's id to link it
+                        self._start_list(stack, v, self.get_child_node(node, k), ref)
+                        break
+                    elif v is not None:
+                        record[k] = v
                 else:
-                    raise Exception('List of lists not allowed.')
+                    stack.pop()
+                    # not in root
+                    if table is not None:
+                        table.update_record(record_id=record_id, record=record, allow_value_update=self.allow_value_update)
+                        if self.store:
+                            self.store.maybe_spill(table)
             else:
-                # list of values: the assumption is that this is a m-n relation
-                # `ref` refers to the first table,
-                # the values are keys of the second table (`table_path`)
-                table = self.get_table(table_path)
-                record = {
-                    table.ref_id_column: v
-                }
-                for k, v in (ref or {}).items():
-                    record[k] = v
-                mn_table_path = self.join_path(table_path, '#')
-                table_mn = self.get_table(mn_table_path)
-                record_id = table_mn.create_record(data=record)
-                table_mn.update_record(record_id=record_id, record=record, allow_value_update=self.allow_value_update)
+                list_items_type = state
+                for v in items:
+                    if list_items_type == 'dict':
+                        self._start_dict(stack, v, node, ref)
+                        break
+                    elif list_items_type == 'list':
+                        # list of lists: not well defined. we could interpret it as
+                        # just multiple batches of data
+                        if self.list_of_list != 'batch':
+                            raise Exception('List of lists not allowed.')
+                        self._start_list(stack, v, node, ref)
+                        break
+                    else:
+                        self._add_list_value(v, node, ref)
+                else:
+                    stack.pop()
+
+    def _add_list_value(self, v, node, ref):
+        # list of values: the assumption is that this is a m-n relation
+        # `ref` refers to the first table,
+        # the values are keys of the second table (`table_path`)
+        table = self.get_node_table(node)
+        record = {
+            table.ref_id_column: v
+        }
+        mn_node = self.get_child_node(node, '#')
+        if ref:
+            self.add_references(mn_node.path, ref)
+            record.update(ref)
+        table_mn = self.get_node_table(mn_node)
+        record_id = table_mn.create_record(data=record)
+        table_mn.update_record(record_id=record_id, record=record, allow_value_update=self.allow_value_update)
+        if self.store:
+            self.store.maybe_spill(table_mn)
+
+    def parse_dict(self, obj, table_path='', ref=None):
+        """Place record in the database.
+
+        Args:
+            obj(dict): possibly nestewd record data
+
+        Returns:
+            record id
+
+        """
+        stack = []
+        try:
+            record_id = self._start_dict(stack, obj, self.get_path_node(table_path), ref)
+            self._parse(stack)
+        finally:
+            self._digests = {}
+        return record_id
+
+    def parse_list(self, obj, table_path='', ref=None):
+        stack = []
+        try:
+            self._start_list(stack, obj, self.get_path_node(table_path), ref)
+            self._parse(stack)
+        finally:
+            self._digests = {}
 
     def parse(self, obj):
         obj_type = self.get_item_type(obj)
@@ -174,18 +509,220 @@ class Database:
         elif obj_type == 'dict':
             self.parse_dict(obj=obj)
         else:
-            if not self.self.allow_single_value:
+            if not self.allow_single_value:
                 raise Exception('Single value not allowed.')
             table = self.get_table(table_path='')
             record = {table.id_column: obj}
             record_id = table.create_record(record)
             table.update_record(record=record, record_id=record_id, allow_value_update=self.allow_value_update)
 
+    def count_records(self, obj, table_path=''):
+        """Count the records that parse_list creates, without creating them
+
+        Returns:
+            dict table_path -> number of records
+        """
+        counts = {}
+        stack = [(table_path, obj)]
+        while stack:
+            path, obj = stack.pop()
+            if isinstance(obj, dict):
+                if path:  # not in root
+                    p = self.resolve_table_path(path)
+                    counts[p] = counts.get(p, 0) + 1
+                for k, v in obj.items():
+                    if isinstance(v, (dict, list, tuple)):
+                        stack.append((self.join_path(path, k), v))
+            elif self.get_list_items_type(obj) == 'value':
+                # m-n records
+                p = self.resolve_table_path(self.join_path(path, '#'))
+                counts[p] = counts.get(p, 0) + len(obj)
+            else:
+                stack.extend((path, v) for v in obj)
+        return counts
+
+    def get_config(self):
+        """
+        Returns:
+            dict of arguments to create an empty Database with the same tables
+        """
+        return {
+            'table_path_map': dict(self.table_path_map),
+            'auto_create': self.auto_create,
+            'allow_value_update': self.allow_value_update,
+            'allow_single_value': self.allow_single_value,
+            'list_of_list': self.list_of_list,
+            'link_1_1_relation': self.link_1_1_relation,
+            'table_class': self.table_class,
+            'deduplicate': self.deduplicate,
+            'tables': [(p, t.name, t.id_column) for p, t in self.tables.items()],
+        }
+
+    def parse_parallel(self, obj, workers=None, shard_size=None):
+        """Parse a list of independent records in a process pool.
+
+        The list is split into shards. First the records of every shard
+        are counted (see count_records), which reserves a block of ids per
+        shard and table. Then the shards are parsed into separate databases,
+        each starting at its own ids, so all auto ids and references to
+        them are final. The shard tables are merged in order without
+        touching single records.
+        The result is identical to `parse(obj)` (with a store, records
+        are spilled per shard: records of a table with its own id column
+        that repeat an id may be stored in another order).
+
+        Args:
+            obj: data, only a list is split
+            workers(int, optional): number of processes (default:
+                os.cpu_count(), no processes for 1)
+            shard_size(int, optional): number of list items per shard
+        """
+        if self.get_item_type(obj) != 'list' or not obj or self.deduplicate:
+            # records are deduplicated across the whole list
+            return self.parse(obj)
+        workers = workers or os.cpu_count() or 1
+        shard_size = shard_size or max(1, -(-len(obj) // (4 * workers)))
+        shards = [obj[i:i + shard_size] for i in range(0, len(obj), shard_size)]
+        if workers == 1 or len(shards) == 1:
+            return self.parse(obj)
+        config = self.get_config()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # ids before the first record of every shard
+            n_records = {p: t.n_records for p, t in self.tables.items()}
+            offsets = []
+            for counts in executor.map(_count_shard, repeat(config), shards):
+                offsets.append(dict(n_records))
+                for p, n in counts.items():
+                    n_records[p] = n_records.get(p, 0) + n
+            for shard in executor.map(_parse_shard, repeat(config), shards, offsets):
+                self.merge_shard(shard)
+
+    def merge_shard(self, shard):
+        """Add the records of a shard, see parse_parallel
+
+        Args:
+            shard: result of _parse_shard
+        """
+        tables, references, links = shard
+        for table_path, table in tables.items():
+            if table_path not in self.tables:
+                self.create_table(table_path=table_path, name=table.name, id_column=table.id_column)
+        for table_path, refs in references.items():
+            for column, ref_table_path in refs.items():
+                self.add_reference(table_path, column, ref_table_path)
+        for table_path, table_links in links.items():
+            merged_links = self.links.setdefault(table_path, {})
+            for column, record_ids in table_links.items():
+                merged_links.setdefault(column, set()).update(record_ids)
+        for table_path, shard_table in tables.items():
+            table = self.tables[table_path]
+            table.extend(shard_table)
+            table.n_records = shard_table.n_records
+            if self.store:
+                self.store.maybe_spill(table)
+
+    def flush(self):
+        """write all records to the store and create the indexes"""
+        if not self.store:
+            return
+        for table in self.tables.values():
+            self.store.spill(table)
+        self.store.create_indexes()
+
+    def get_data(self):
+        """
+        Returns:
+            list: table data
+                * items are {name, schema, data}
+                * values of data are lists of tuples, id first
+        """
+        self.flush()
+        result = []
+        for table in self.tables.values():
+            if self.store:
+                rows = list(self.store.iter_rows(table))
+            else:
+                rows = list(table.iter_rows())
+            result.append({'name': table.name, 'schema': table.get_schema(), 'data': rows})
+        return result
+
+    def get_denormalizer(self):
+        """
+        Returns:
+            filetools.relational.Denormalizer for all tables, relations
+            from `references`: dicts linked down are nested as dicts
+            (only in the records in `links`, a key can hold dicts and
+            values), other child tables as lists, m-n tables as lists of
+            values. A key must not hold dicts in some records and lists
+            in others.
+        """
+        denormalizer = Denormalizer(self.get_data(), id_column=AUTO_ID_COLUMN)
+        linked_down = set()
+        for table_path, refs in self.references.items():
+            for column, ref_table_path in refs.items():
+                if column != self.tables[ref_table_path].ref_id_column:
+                    # only records in `links` hold ids, others hold values
+                    row_ids = self.links.get(table_path, {}).get(column, set())
+                    denormalizer.add_reference(self.tables[table_path].name, column, self.tables[ref_table_path].name, row_ids=row_ids)
+                    linked_down.add(ref_table_path)
+        for table_path, refs in self.references.items():
+            for column, ref_table_path in refs.items():
+                if column != self.tables[ref_table_path].ref_id_column:
+                    continue
+                name = self.tables[table_path].name
+                if table_path in linked_down:
+                    denormalizer.hide_column(name, column)
+                    continue
+                list_path, key = table_path.rsplit('/', 1)
+                value_column = None
+                if key == '#':  # m-n table: list of values
+                    value_column = self.get_table(list_path).ref_id_column
+                    key = list_path.rsplit('/', 1)[1]
+                denormalizer.add_children(self.tables[ref_table_path].name, name, key, column, value_column=value_column)
+        return denormalizer
+
+    def iter_documents(self, table_path):
+        """rebuild the nested records of a table
+
+        Yields:
+            dict for every record of the table
+        """
+        denormalizer = self.get_denormalizer()
+        yield from denormalizer.iter_documents(self.get_table(table_path).name)
+
+
+def _count_shard(config, obj):
+    """count the records of a list (in a worker process), see
+    Database.count_records"""
+    config = dict(config)
+    config.pop('tables')
+    return Database(**config).count_records(obj)
+
+
+def _parse_shard(config, obj, id_offsets):
+    """parse a list in a new Database (in a worker process)
+
+    Args:
+        id_offsets: table_path -> number of ids reserved before the shard
+
+    Returns:
+        tuple (tables, references, links), tables maps table_path to Table
+    """
+    config = dict(config)
+    tables = config.pop('tables')
+    db = Database(**config)
+    db.id_offsets = id_offsets
+    for table_path, name, id_column in tables:
+        db.create_table(table_path=table_path, name=name, id_column=id_column)
+    db.parse_list(obj)
+    return db.tables, db.references, db.links
+
 
-db = Database(auto_create=False)
-db.create_table(table_path='/t1', id_column='tid')
-db.create_table(table_path='')
-db.create_table(table_path='/#')
-# db.parse({"t1": [{"tid": 9}, {"tid": 8}]})
-db.parse([{}])
-print(db.get_data())
\ No newline at end of file
+if __name__ == '__main__':
+    db = Database(auto_create=False)
+    db.create_table(table_path='/t1', id_column='tid')
+    db.create_table(table_path='')
+    db.create_table(table_path='/#')
+    # db.parse({"t1": [{"tid": 9}, {"tid": 8}]})
+    db.parse([{}])
+    print(db.get_data())